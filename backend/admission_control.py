@@ -0,0 +1,134 @@
+"""
+Cost-based admission control for Odoo-heavy endpoints
+
+Every endpoint has an estimated cost in tokens (relative units: one light
+dashboard section costs 1, parameterised queries grow with their window).
+A request is admitted only if both the caller's bucket and the global bucket
+can pay for it. A slice of the global bucket is reserved for
+cheap requests, so wallboard refreshes keep working while expensive ad-hoc
+queries are being throttled. Rejections become 429 with Retry-After.
+"""
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Tuple, Union
+
+from fastapi import Depends, HTTPException, Request, status
+
+from database import User
+
+class TokenBucket:
+    """Classic token bucket: refills at rate tokens/second up to capacity"""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def wait_time(self, cost: float, keep: float = 0.0) -> float:
+        """Seconds until cost can be paid while leaving keep tokens behind (0 if it can now)"""
+        missing = cost + keep - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate > 0 else math.inf
+
+class AdmissionController:
+    def __init__(self, global_rate: float = 20.0, global_burst: float = 200.0,
+                 user_rate: float = 2.0, user_burst: float = 120.0,
+                 cheap_cost: float = 4.0, reserve_fraction: float = 0.25,
+                 max_tracked_users: int = 10000):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.cheap_cost = cheap_cost
+        # Tokens of the global bucket that only cheap requests may spend
+        self.reserve = global_burst * reserve_fraction
+        self.max_tracked_users = max_tracked_users
+
+        self._users: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+
+    def _user_bucket(self, user_key: str, now: float) -> TokenBucket:
+        bucket = self._users.get(user_key)
+        if bucket is None:
+            if len(self._users) >= self.max_tracked_users:
+                # Forget users whose buckets have refilled; they carry no state worth keeping
+                for key, b in list(self._users.items()):
+                    b.refill(now)
+                    if b.tokens >= b.capacity:
+                        del self._users[key]
+            bucket = self._users[user_key] = TokenBucket(self.user_rate, self.user_burst)
+        return bucket
+
+    def admit(self, user_key: str, cost: float) -> Tuple[bool, float]:
+        """
+        Try to admit a request of the given cost
+        Returns (admitted, retry_after_seconds). Costs larger than a bucket's capacity
+        are clamped, so an expensive request needs a full bucket rather than being
+        impossible.
+        """
+        now = time.monotonic()
+        with self._lock:
+            user_bucket = self._user_bucket(user_key, now)
+            user_bucket.refill(now)
+            self.global_bucket.refill(now)
+
+            user_cost = min(cost, user_bucket.capacity)
+            global_cost = min(cost, self.global_bucket.capacity - self.reserve)
+            keep = 0.0 if cost <= self.cheap_cost else self.reserve
+
+            wait = max(user_bucket.wait_time(user_cost), self.global_bucket.wait_time(global_cost, keep))
+            if wait > 0:
+                self.rejected += 1
+                return False, wait
+
+            user_bucket.tokens -= user_cost
+            self.global_bucket.tokens -= global_cost
+            self.admitted += 1
+            return True, 0.0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self.global_bucket.refill(time.monotonic())
+            return {
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'global_tokens': round(self.global_bucket.tokens, 1),
+                'tracked_users': len(self._users),
+            }
+
+admission_controller = AdmissionController(
+    global_rate=float(os.getenv('ADMISSION_GLOBAL_RATE', '20')),
+    global_burst=float(os.getenv('ADMISSION_GLOBAL_BURST', '200')),
+    user_rate=float(os.getenv('ADMISSION_USER_RATE', '2')),
+    user_burst=float(os.getenv('ADMISSION_USER_BURST', '120')),
+    cheap_cost=float(os.getenv('ADMISSION_CHEAP_COST', '4')),
+    reserve_fraction=float(os.getenv('ADMISSION_RESERVE_FRACTION', '0.25')),
+)
+
+def require_admission(cost: Union[float, Callable[[Request], float]], authorize: Callable[..., User]):
+    """
+    Dependency factory: charge the request's estimated cost or reject with 429
+    cost is either a constant or a function of the request (e.g. its query parameters).
+    authorize is the route's role dependency (e.g. require_executive); it runs first,
+    so requests that end in 401/403 never spend tokens.
+    """
+    def admission_checker(request: Request, current_user: User = Depends(authorize)) -> User:
+        request_cost = cost(request) if callable(cost) else cost
+        admitted, retry_after = admission_controller.admit(current_user.username, request_cost)
+        if not admitted:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many Odoo-heavy requests (estimated cost {request_cost:.0f}), retry later",
+                headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))}
+            )
+        return current_user
+    return admission_checker
@@ -1,7 +1,9 @@
 """
 FastAPI dependencies for authentication and authorization
 """
-from fastapi import Depends, HTTPException, status
+import hmac
+import os
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db, User, UserRole
@@ -74,6 +76,17 @@ require_operator = require_role(UserRole.OPERATOR)
 require_executive = require_role(UserRole.EXECUTIVE)
 require_visitor = require_role(UserRole.VISITOR)
 
+def require_webhook_token(x_webhook_token: Optional[str] = Header(None)):
+    """
+    Authenticate machine-to-machine calls (e.g. Odoo automated actions) by a shared
+    secret in the X-Webhook-Token header; disabled while ODOO_WEBHOOK_TOKEN is unset
+    """
+    expected = os.getenv("ODOO_WEBHOOK_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook not configured")
+    if not x_webhook_token or not hmac.compare_digest(x_webhook_token.encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook token")
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db)
@@ -0,0 +1,85 @@
+"""
+Container stats: fetching every container vs read_group
+
+For each fleet size a synthetic x_container table is built. The previous
+approach (search_read of location and filled flag for every container,
+counted in Python) is compared with the read_group used now, whose groups
+are aggregated up front the way Odoo's SQL would. Both are encoded as an
+XML-RPC response; the benchmark reports bytes on the wire and client time
+(parse plus OdooAPI2.get_all_locations_container_stats), which stay flat
+for read_group however many containers there are.
+
+Usage (from backend/, ODOO2_* must be set; dummy values are enough):
+    python benchmarks/bench_container_stats.py
+    python benchmarks/bench_container_stats.py --counts 10000,100000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import xmlrpc.client
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_api2 import odoo_api2
+
+LOCATIONS = ['RUW', 'KEZAD', 'ICAD', 'DIC', 'NDP', 'Siji', 'Khalifa Port']
+
+def synthetic_containers(count: int):
+    return [
+        {'id': i, 'x_studio_location': LOCATIONS[i % len(LOCATIONS)], 'x_studio_filled': i % 3 == 0}
+        for i in range(1, count + 1)
+    ]
+
+def server_read_group(containers):
+    """What Odoo returns for read_group(groupby=[location, filled], lazy=False)"""
+    counts = {}
+    for c in containers:
+        key = (c['x_studio_location'], c['x_studio_filled'])
+        counts[key] = counts.get(key, 0) + 1
+    return [
+        {'x_studio_location': location, 'x_studio_filled': filled, '__count': count,
+         '__domain': [['x_studio_location', '=', location], ['x_studio_filled', '=', filled]]}
+        for (location, filled), count in counts.items()
+    ]
+
+def legacy_stats(containers):
+    """The previous client-side counting over every container"""
+    location_stats = {}
+    for container in containers:
+        stats = location_stats.setdefault(container.get('x_studio_location', 'Unknown'),
+                                          {'total': 0, 'loaded': 0, 'empty': 0})
+        stats['total'] += 1
+        stats['loaded' if container.get('x_studio_filled') else 'empty'] += 1
+    return location_stats
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def run(counts, repeat: int):
+    print(f"{'containers':>12} {'approach':<12} {'wire bytes':>14} {'client ms':>10}")
+    for count in counts:
+        containers = synthetic_containers(count)
+        legacy_body = xmlrpc.client.dumps((containers,), methodresponse=True)
+        grouped_body = xmlrpc.client.dumps((server_read_group(containers),), methodresponse=True)
+        del containers
+
+        legacy_s = timed(lambda: legacy_stats(xmlrpc.client.loads(legacy_body)[0][0]), repeat)
+        odoo_api2.execute_kw = lambda *args, **kwargs: xmlrpc.client.loads(grouped_body)[0][0]
+        grouped_s = timed(odoo_api2.get_all_locations_container_stats, repeat)
+
+        print(f"{count:>12,} {'search_read':<12} {len(legacy_body):>14,} {legacy_s * 1000:>10.1f}")
+        print(f"{count:>12,} {'read_group':<12} {len(grouped_body):>14,} {grouped_s * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', default='10000,100000,1000000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run([int(c) for c in args.counts.split(',')], args.repeat)
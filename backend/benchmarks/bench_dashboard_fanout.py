@@ -0,0 +1,111 @@
+"""
+Sequential vs concurrent /api/dashboard/all against a latency-injected Odoo
+
+The real endpoint runs through FastAPI's TestClient with the auth dependency
+overridden and OdooAPI.execute_kw replaced by a stand-in that sleeps for
+--latency seconds per call and returns canned records. A fan-out cap of 1 is
+the old sequential behaviour.
+
+Usage (from backend/):
+    python benchmarks/bench_dashboard_fanout.py --latency 0.2 --silos 4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Dummy connection settings; no request ever reaches a real Odoo
+for prefix in ('ODOO', 'ODOO2'):
+    os.environ.setdefault(f'{prefix}_URL', 'http://odoo.invalid')
+    os.environ.setdefault(f'{prefix}_DB', 'bench')
+    os.environ.setdefault(f'{prefix}_USERNAME', 'bench')
+    os.environ.setdefault(f'{prefix}_API_KEY', 'bench')
+
+from fastapi.testclient import TestClient
+
+import main
+from admission_control import admission_controller
+from auth_dependencies import get_current_active_user
+from dashboard_cache import ResponseCache
+from database import UserRole
+
+class LatencyOdoo:
+    """Stand-in for OdooAPI.execute_kw: fixed latency per round trip, canned results"""
+    def __init__(self, latency: float, silos: int):
+        self.latency = latency
+        self.silos = silos
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def execute_kw(self, model, method, args=None, kwargs=None, cache=True):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        silos = range(1, self.silos + 1)
+        if model == 'x_stockpile':
+            return [
+                {
+                    'id': i, 'x_name': f'NDP Silo {i}', 'x_studio_terminal': 'NDP',
+                    'x_studio_show_in_dashboard': True, 'x_studio_capacity': 1000.0,
+                    'x_studio_quantity_in_stock_t': 500.0, 'x_studio_material': [i, f'Material {i}'],
+                    'x_studio_last_fwo': f'FWO/{i:04d}',
+                }
+                for i in silos
+            ]
+        if model == 'x_material' and method == 'search_read':
+            return [{'id': i, 'x_name': f'Material {i}', 'write_date': '2025-01-01 00:00:00'} for i in silos]
+        # Reference data load and name lookups, not the forwarding orders query
+        if model == 'x_fwo' and any(term[0] in ('create_date', 'write_date', 'x_name') for term in args[0]):
+            return [{'id': i, 'x_name': f'FWO/{i:04d}', 'write_date': '2025-01-01 00:00:00'} for i in silos]
+        if model == 'x_first_mile_freight' and method == 'read_group' and 'x_studio_material' in args[2]:
+            return [
+                {
+                    'x_studio_forwarding_order_selectable': [i, f'FWO/{i:04d}'],
+                    'x_studio_material': [i, f'Material {i}'],
+                    'x_studio_selection_field_1d4_1icdknqu2': 'Train Departed', '__count': 3,
+                    'x_studio_actual_date_and_time_of_gate_in': '2025-01-01 06:00:00',
+                }
+                for i in silos
+            ]
+        return []
+
+def run(latency: float, silos: int, concurrency_levels, repeat: int):
+    stand_in = LatencyOdoo(latency, silos)
+    main.odoo_api.uid = 1
+    main.odoo_api.execute_kw = stand_in.execute_kw
+    user = SimpleNamespace(username='bench', role=UserRole.EXECUTIVE, is_active=True)
+    main.app.dependency_overrides[get_current_active_user] = lambda: user
+    # Measure Odoo fan-out, not cache hits
+    main.response_cache = ResponseCache(default_ttl=0)
+    admission_controller.global_bucket.rate = admission_controller.user_rate = float('inf')
+    client = TestClient(main.app)
+
+    print(f"/api/dashboard/all with {latency * 1000:.0f} ms per Odoo call, {silos} NDP silos")
+    print(f"{'concurrency':>11} {'odoo calls':>11} {'wall ms':>9}")
+    baseline = None
+    for level in concurrency_levels:
+        main.DASHBOARD_FANOUT_CONCURRENCY = level
+        timings = []
+        for _ in range(repeat):
+            stand_in.calls = 0
+            start = time.perf_counter()
+            response = client.get('/api/dashboard/all')
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+        best = min(timings)
+        baseline = baseline or best
+        label = 'sequential' if level == 1 else str(level)
+        print(f"{label:>11} {stand_in.calls:>11} {best * 1000:>9.0f}  ({baseline / best:.1f}x)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per Odoo round trip')
+    parser.add_argument('--silos', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 5])
+    args = parser.parse_args()
+    run(args.latency, args.silos, args.concurrency, args.repeat)
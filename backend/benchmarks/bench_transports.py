@@ -0,0 +1,103 @@
+"""
+Compare XML-RPC and JSON-RPC for the same search_read result
+
+Synthetic mode (default) builds an x_container search_read result of the
+requested size, encodes it the way Odoo does for each endpoint and measures
+bytes on the wire (raw and gzip) and client-side parse time.
+
+Live mode (--live) runs the same search_read against the configured Odoo2
+instance over both transports and reports wall-clock time.
+
+Usage (from backend/):
+    python benchmarks/bench_transports.py --records 50000
+    python benchmarks/bench_transports.py --live --model x_container --limit 20000
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+import xmlrpc.client
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def synthetic_records(count: int):
+    locations = ['RUW', 'KEZAD', 'ICAD', 'DIC', 'NDP']
+    return [
+        {
+            'id': i,
+            'x_name': f'CONT{i:07d}',
+            'x_studio_location': locations[i % len(locations)],
+            'x_studio_filled': i % 3 == 0,
+            'write_date': '2025-01-15 08:30:00',
+        }
+        for i in range(1, count + 1)
+    ]
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def run_synthetic(count: int, repeat: int):
+    records = synthetic_records(count)
+
+    xml_body = xmlrpc.client.dumps((records,), methodresponse=True, allow_none=False).encode()
+    json_body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': records}).encode()
+
+    results = {
+        'xmlrpc': {
+            'raw_bytes': len(xml_body),
+            'gzip_bytes': len(gzip.compress(xml_body)),
+            'parse_s': timed(lambda: xmlrpc.client.loads(xml_body), repeat),
+        },
+        'jsonrpc': {
+            'raw_bytes': len(json_body),
+            'gzip_bytes': len(gzip.compress(json_body)),
+            'parse_s': timed(lambda: json.loads(json_body), repeat),
+        },
+    }
+
+    print(f"search_read result with {count} records (median of {repeat} parses)")
+    print(f"{'transport':<10} {'raw bytes':>14} {'gzip bytes':>12} {'parse ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['raw_bytes']:>14,} {r['gzip_bytes']:>12,} {r['parse_s'] * 1000:>10.1f}")
+    speedup = results['xmlrpc']['parse_s'] / max(results['jsonrpc']['parse_s'], 1e-9)
+    print(f"JSON-RPC parses {speedup:.1f}x faster")
+
+def run_live(model: str, limit: int, repeat: int):
+    from odoo_client import OdooClient
+
+    class Bench(OdooClient):
+        env_prefix = 'ODOO2'
+        label = 'Odoo2'
+
+    for kind in ('xmlrpc', 'jsonrpc'):
+        os.environ['ODOO2_TRANSPORT'] = kind
+        client = Bench()
+        client.authenticate()
+        call = lambda: client.execute_kw(model, 'search_read', [[]],
+                                         {'fields': ['x_studio_location', 'x_studio_filled'], 'limit': limit})
+        call()  # warm the connection
+        elapsed = timed(call, repeat)
+        print(f"{kind:<10} {elapsed * 1000:>10.1f} ms  {client.get_stats()}")
+        client.transport.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true')
+    parser.add_argument('--model', default='x_container')
+    parser.add_argument('--limit', type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.live:
+        run_live(args.model, args.limit, args.repeat)
+    else:
+        run_synthetic(args.records, args.repeat)
@@ -0,0 +1,185 @@
+"""
+Storage backends for cached dashboard results
+
+A backend stores JSON-serialisable values under string keys with an expiry
+time. SqliteCacheBackend keeps entries in a SQLite file, so every uvicorn
+worker (or container sharing the file through a volume) on the host sees the
+same results.
+
+Select the backend with CACHE_BACKEND = memory | sqlite. With memory there is
+no shared backend: each process only has the in-memory tier of ResponseCache.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend:
+    """Interface implemented by every cache backend"""
+    name = 'base'
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for a live entry, None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with prefix; returns how many were deleted"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Cross-process store in a SQLite file
+    Each write is a single INSERT OR REPLACE transaction, so readers in other
+    processes see either the old or the new value, never a partial one. WAL
+    mode lets readers proceed while a writer commits. Expired rows and rows
+    beyond max_entries are purged every purge_every writes.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path: str = './dashboard_cache.sqlite3', max_entries: int = 1024,
+                 purge_every: int = 100, **_):
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for this process; caller holds the lock"""
+        # A forked worker must not reuse its parent's connection
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' stored_at REAL NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_entries_expires_at ON cache_entries (expires_at)')
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key):
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    'SELECT value, expires_at FROM cache_entries WHERE key = ? AND expires_at > ?',
+                    (key, time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            # The shared tier is an optimisation; a broken file must not break requests
+            self.errors += 1
+            logger.warning(f"Shared cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        body = json.dumps(value, separators=(',', ':'), default=str)
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)',
+                    (key, body, now, now + ttl)
+                )
+                self._writes += 1
+                if self._writes % self.purge_every == 0:
+                    self._purge(conn, now)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared cache write failed: {e}")
+
+    def _purge(self, conn: sqlite3.Connection, now: float):
+        conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+        conn.execute(
+            'DELETE FROM cache_entries WHERE key NOT IN '
+            '(SELECT key FROM cache_entries ORDER BY stored_at DESC LIMIT ?)',
+            (self.max_entries,)
+        )
+
+    def delete(self, key):
+        try:
+            with self._lock:
+                self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared cache delete failed: {e}")
+
+    def delete_prefix(self, prefix):
+        try:
+            with self._lock:
+                # substr rather than LIKE: keys contain '_', a LIKE wildcard
+                return self._connection().execute(
+                    'DELETE FROM cache_entries WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+                ).rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared cache delete failed: {e}")
+            return 0
+
+    def clear(self):
+        try:
+            with self._lock:
+                self._connection().execute('DELETE FROM cache_entries')
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Shared cache clear failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def stats(self):
+        try:
+            with self._lock:
+                entries = self._connection().execute(
+                    'SELECT COUNT(*) FROM cache_entries WHERE expires_at > ?', (time.time(),)
+                ).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {'path': self.path, 'entries': entries, 'max_entries': self.max_entries, 'errors': self.errors}
+
+CACHE_BACKENDS = {
+    SqliteCacheBackend.name: SqliteCacheBackend,
+}
+
+def create_cache_backend(kind: Optional[str], **settings) -> Optional[CacheBackend]:
+    """Build the shared cache backend named by kind; None for 'memory' (nothing shared)"""
+    kind = (kind or 'memory').lower()
+    if kind == 'memory':
+        return None
+    backend_cls = CACHE_BACKENDS.get(kind)
+    if backend_cls is None:
+        raise ValueError(f"Unknown cache backend '{kind}', expected one of: memory, {', '.join(CACHE_BACKENDS)}")
+    return backend_cls(**settings)
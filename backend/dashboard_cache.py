@@ -0,0 +1,195 @@
+"""
+Caches for computed dashboard sections
+"""
+import asyncio
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from cache_backend import CacheBackend
+
+class LastGoodCache:
+    """
+    Last successfully computed result per dashboard section
+    Used to keep wallboards populated (marked stale) while Odoo is failing.
+    """
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        """Record a good result; stored_at (epoch seconds) defaults to now"""
+        with self._lock:
+            self._entries[key] = (value, stored_at or time.time())
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) or None if the section never succeeded"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        return value, time.time() - stored_at
+
+class ResponseCache:
+    """
+    Shared TTL cache of computed dashboard sections
+    Section data is the same for every caller, so one computation serves all
+    wallboards until it expires. Entries are evicted least-recently-used once
+    max_entries is reached, which bounds memory for parameterised sections.
+
+    With a shared backend the in-process LRU is only the front tier: misses
+    fall through to the shared store that every worker on the host reads and
+    writes. Values found there are kept locally for at most local_ttl seconds,
+    so results published by other workers show up quickly.
+    """
+    def __init__(self, max_entries: int = 256, default_ttl: float = 60.0,
+                 ttls: Optional[Dict[str, float]] = None, shared: Optional[CacheBackend] = None,
+                 local_ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, key: Hashable) -> float:
+        """TTL of a section; tuple keys like ('train_departures', 14) use their first element"""
+        name = key[0] if isinstance(key, tuple) else key
+        return self.ttls.get(name, self.default_ttl)
+
+    @staticmethod
+    def shared_key(key: Hashable) -> str:
+        """String form of a section key for the shared backend"""
+        return json.dumps(key, separators=(',', ':'), default=str)
+
+    def _store_local(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _get_local(self, key: Hashable) -> Tuple[bool, Any]:
+        """(True, value) for a live local entry; without a shared tier a miss is final"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            if self.shared is None:
+                self.misses += 1
+            return False, None
+
+    def _get_shared(self, key: Hashable) -> Optional[Any]:
+        shared_entry = self.shared.get(self.shared_key(key))
+        if shared_entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        value, expires_at = shared_entry
+        self._store_local(key, value, min(self.local_ttl, expires_at - time.time()))
+        with self._lock:
+            self.shared_hits += 1
+        return value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        found, value = self._get_local(key)
+        if found or self.shared is None:
+            return value
+        return self._get_shared(key)
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a computed section for ttl seconds (default: the section's TTL)"""
+        ttl = self.ttl_for(key) if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._store_local(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), value, ttl)
+
+    def invalidate_section(self, name: str) -> int:
+        """
+        Drop every entry of a section, plain or parameterised (name or (name, ...))
+        Returns the number of local entries dropped.
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if key == name or (isinstance(key, tuple) and key and key[0] == name)
+            ]
+            for key in keys:
+                del self._entries[key]
+        if self.shared is not None:
+            self.shared.delete(self.shared_key(name))
+            # Tuple keys are stored as JSON arrays: ["name",...]
+            self.shared.delete_prefix(self.shared_key([name])[:-1] + ',')
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    # ------------------------------------------------------------------
+    # Async access path: the shared backend blocks (SQLite waits up to its
+    # busy timeout), so from the event loop it's only called on a worker thread
+    # ------------------------------------------------------------------
+
+    async def _off_loop(self, func: Callable, *args, **kwargs) -> Any:
+        if self.shared is None:
+            return func(*args, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def get_async(self, key: Hashable) -> Optional[Any]:
+        """Async version of get(); local hits are answered without a thread hop"""
+        found, value = self._get_local(key)
+        if found or self.shared is None:
+            return value
+        return await asyncio.to_thread(self._get_shared, key)
+
+    async def put_async(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Async version of put()"""
+        await self._off_loop(self.put, key, value, ttl)
+
+    async def invalidate_section_async(self, name: str) -> int:
+        """Async version of invalidate_section()"""
+        return await self._off_loop(self.invalidate_section, name)
+
+    async def clear_async(self):
+        """Async version of clear()"""
+        await self._off_loop(self.clear)
+
+    async def stats_async(self) -> Dict[str, Any]:
+        """Async version of stats()"""
+        return await self._off_loop(self.stats)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            stats = {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.shared_hits) / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+            }
+        if self.shared is not None:
+            stats['shared'] = {'backend': self.shared.name, **self.shared.stats()}
+        return stats
@@ -0,0 +1,120 @@
+"""
+Leader election between worker processes without external services
+
+Workers compete for a lease row in a SQLite file they can all reach. The
+holder renews it every renew_interval; if it dies, the lease expires after
+lease_ttl and the next worker to try takes over. Only the leader polls Odoo
+in the background, so Odoo load stays constant however many workers run.
+"""
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Callable, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LeaderLease:
+    """
+    A named lease in a SQLite file
+    try_acquire() runs in a single IMMEDIATE transaction, so two workers can
+    never both see the lease as free and take it.
+    """
+    def __init__(self, path: str, name: str = 'dashboard-refresher', lease_ttl: float = 30.0,
+                 renew_interval: Optional[float] = None):
+        self.path = path
+        self.name = name
+        self.lease_ttl = lease_ttl
+        self.renew_interval = renew_interval or lease_ttl / 3
+        self.holder_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        # Called with the new state on every change, from the thread that checked the lease
+        self.on_change: Optional[Callable[[bool], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.elections_won = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS leader_lease ('
+            ' name TEXT PRIMARY KEY,'
+            ' holder TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        return conn
+
+    def try_acquire(self) -> bool:
+        """Take or renew the lease; returns whether this process holds it"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT holder, expires_at FROM leader_lease WHERE name = ?', (self.name,)).fetchone()
+            if row is None or row[0] == self.holder_id or row[1] <= now:
+                conn.execute(
+                    'INSERT OR REPLACE INTO leader_lease (name, holder, expires_at) VALUES (?, ?, ?)',
+                    (self.name, self.holder_id, now + self.lease_ttl)
+                )
+                acquired = True
+            else:
+                acquired = False
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logger.warning(f"Leader lease check failed: {e}")
+            acquired = False
+        finally:
+            conn.close()
+        self._set_leader(acquired)
+        return acquired
+
+    def release(self):
+        """Give up the lease so another worker can take over without waiting for it to expire"""
+        if not self.is_leader:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM leader_lease WHERE name = ? AND holder = ?', (self.name, self.holder_id))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not release leader lease: {e}")
+        finally:
+            conn.close()
+        self._set_leader(False)
+
+    def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        if leader:
+            self.elections_won += 1
+        logger.info(f"{self.holder_id} {'became' if leader else 'is no longer'} the {self.name} leader")
+        if self.on_change is not None:
+            self.on_change(leader)
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.try_acquire)
+            await asyncio.sleep(self.renew_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f'lease-{self.name}')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.release)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'holder_id': self.holder_id,
+            'is_leader': self.is_leader,
+            'lease_ttl': self.lease_ttl,
+            'elections_won': self.elections_won,
+        }
@@ -1,17 +1,26 @@
-from fastapi import FastAPI, HTTPException, Request, Depends, status
+from fastapi import FastAPI, HTTPException, Request, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, Hashable
+import asyncio
 import logging
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from odoo_api import OdooAPI
 from odoo_api2 import odoo_api2
+from odoo_resilience import CircuitOpenError, BulkheadFullError
+from dashboard_cache import LastGoodCache, ResponseCache
+from cache_backend import create_cache_backend
+from snapshot_refresher import LoadedSection, SnapshotRefresher
+from leader_election import LeaderLease
+from odoo_changes import ChangeProbe, ChangeWatch
+from admission_control import admission_controller, require_admission
 from database import get_db, init_db, User, UserRole
 from auth_service import AuthService
 from auth_models import (
@@ -21,7 +30,7 @@ from auth_models import (
 )
 from auth_dependencies import (
     get_current_user, get_current_active_user, require_admin, 
-    require_operator, require_executive, require_visitor, security
+    require_operator, require_executive, require_visitor, require_webhook_token, security
 )
 
 # Configure logging
@@ -34,23 +43,264 @@ odoo_api = OdooAPI()
 # Initialize Auth Service
 auth_service = AuthService()
 
+# Last good result per dashboard section, served when Odoo is failing
+last_good = LastGoodCache()
+
+# Seconds a computed section is shared between callers before Odoo is queried again;
+# override per section with RESPONSE_CACHE_TTL_<SECTION>, e.g. RESPONSE_CACHE_TTL_STOCKPILES=600
+RESPONSE_CACHE_DEFAULT_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SECTION_TTLS = {
+    "forwarding_orders": 120,
+    "first_mile_truck": 60,
+    "last_mile_icad": 60,
+    "last_mile_dic": 60,
+    "stockpiles": 300,
+    "siji_loading_progress": 60,
+    "ruw_containers": 120,
+    "all_locations_containers": 120,
+    "train_departures": 300,
+}
+# Storage shared by all worker processes on the host (memory = this process only)
+shared_cache = create_cache_backend(
+    os.getenv("CACHE_BACKEND", "memory"),
+    path=os.getenv("SHARED_CACHE_PATH", "./dashboard_cache.sqlite3"),
+    max_entries=int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "1024"))
+)
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+    default_ttl=RESPONSE_CACHE_DEFAULT_TTL,
+    ttls={
+        name: float(os.getenv(f"RESPONSE_CACHE_TTL_{name.upper()}", ttl))
+        for name, ttl in RESPONSE_CACHE_SECTION_TTLS.items()
+    },
+    shared=shared_cache,
+    local_ttl=float(os.getenv("SHARED_CACHE_LOCAL_TTL", "5"))
+)
+
+# Max sections of /api/dashboard/all fetched from Odoo at the same time
+DASHBOARD_FANOUT_CONCURRENCY = int(os.getenv("DASHBOARD_FANOUT_CONCURRENCY", "5"))
+
+# Sections rebuilt in the background, with their refresh interval in seconds; override
+# with SNAPSHOT_INTERVAL_<SECTION> (0 disables a section) or SNAPSHOT_REFRESH_ENABLED=false
+SNAPSHOT_REFRESH_ENABLED = os.getenv("SNAPSHOT_REFRESH_ENABLED", "true").lower() == "true"
+SNAPSHOT_SECTION_INTERVALS = {
+    "forwarding_orders": 120,
+    "first_mile_truck": 60,
+    "last_mile_icad": 60,
+    "last_mile_dic": 60,
+    "stockpiles": 300,
+    "siji_loading_progress": 60,
+    "ruw_containers": 120,
+    "all_locations_containers": 300,
+    "train_departures": 300,
+}
+# Odoo models each section is computed from. A section is only rebuilt when one of
+# them has a newer write_date, polling less often (up to SNAPSHOT_MAX_INTERVAL_<SECTION>,
+# default SNAPSHOT_MAX_INTERVAL_FACTOR x its interval) while nothing changes
+SNAPSHOT_CHANGE_PROBES_ENABLED = os.getenv("SNAPSHOT_CHANGE_PROBES_ENABLED", "true").lower() == "true"
+SNAPSHOT_MAX_INTERVAL_FACTOR = float(os.getenv("SNAPSHOT_MAX_INTERVAL_FACTOR", "5"))
+SNAPSHOT_SECTION_MODELS = {
+    "forwarding_orders": (odoo_api, ["x_fwo", "x_first_mile_freight"]),
+    "first_mile_truck": (odoo_api, ["x_first_mile_freight"]),
+    "last_mile_icad": (odoo_api, ["x_last_mile_freight"]),
+    "last_mile_dic": (odoo_api, ["x_last_mile_freight"]),
+    "stockpiles": (odoo_api, ["x_stockpile", "x_fwo", "x_first_mile_freight"]),
+    "siji_loading_progress": (odoo_api, ["x_rail_freight_order", "x_wagon_trip"]),
+    "ruw_containers": (odoo_api2, ["x_container"]),
+    "all_locations_containers": (odoo_api2, ["x_container"]),
+    "train_departures": (odoo_api2, ["x_scheduled_train"]),
+}
+snapshot_refresher = SnapshotRefresher(
+    stale_factor=float(os.getenv("SNAPSHOT_STALE_FACTOR", "3")),
+    # Persisted so a restart can serve the last known good data straight away; empty disables
+    persist_path=os.getenv("SNAPSHOT_FILE", "./dashboard_snapshot.json.gz") or None,
+    persist_interval=float(os.getenv("SNAPSHOT_PERSIST_INTERVAL", "30"))
+)
+# Background results also become the fallback served while Odoo is failing
+snapshot_refresher.on_publish = last_good.put
+
+# With a shared store, workers elect one leader through a lease in the same file;
+# only the leader polls Odoo, the others pick up what it publishes
+leader_lease = None if shared_cache is None else LeaderLease(
+    os.getenv("LEADER_LEASE_PATH", os.getenv("SHARED_CACHE_PATH", "./dashboard_cache.sqlite3")),
+    lease_ttl=float(os.getenv("LEADER_LEASE_TTL", "30"))
+)
+
+def is_follower() -> bool:
+    return leader_lease is not None and not leader_lease.is_leader
+
+def on_leadership_change(leader: bool):
+    """A new leader rebuilds every section straight away instead of at its next interval"""
+    if leader:
+        logger.info("Took over background refresh; rebuilding all sections")
+        for name in SNAPSHOT_SECTION_INTERVALS:
+            snapshot_refresher.request_refresh(name)
+
+def shared_section_key(section: str) -> str:
+    """Shared-store key of the leader's latest build of a background section"""
+    return f"snapshot:{section}"
+
+def shared_verified_key(section: str) -> str:
+    """Shared-store key of the last time the leader confirmed a section unchanged"""
+    return f"snapshot_verified:{section}"
+
+# TTL of each background section's shared entries
+shared_section_ttls: Dict[str, float] = {}
+
+def read_shared_section(name: str) -> Optional[LoadedSection]:
+    """The leader's latest build of a section with its timestamps, or None if there is none"""
+    entry = shared_cache.get(shared_section_key(name))
+    if entry is None:
+        return None
+    value, _ = entry
+    verified = shared_cache.get(shared_verified_key(name))
+    return LoadedSection(value["data"], value["built_at"], max(value["built_at"], verified[0] if verified else 0))
+
+def shared_section_loader(name: str, loader: Callable[[], Awaitable[Any]], interval: float):
+    """
+    Background loader: the leader queries Odoo and publishes the result, with its build
+    time, to the shared store; followers only read it, so Odoo load doesn't grow with workers
+    """
+    if shared_cache is None:
+        return loader
+    # Outlives the next refresh, so followers never find a gap between two of them
+    shared_section_ttls[name] = interval * snapshot_refresher.stale_factor
+
+    async def load():
+        if is_follower():
+            return await asyncio.to_thread(read_shared_section, name)
+        data = await loader()
+        built_at = time.time()
+        await asyncio.to_thread(shared_cache.set, shared_section_key(name),
+                                {"data": data, "built_at": built_at}, shared_section_ttls[name])
+        return LoadedSection(data, built_at, built_at)
+    return load
+
+async def share_verification(name: str, verified_at: float):
+    """Leader: let followers know a section was confirmed unchanged, so they don't report it stale"""
+    if shared_cache is None or is_follower() or name not in shared_section_ttls:
+        return
+    try:
+        await asyncio.to_thread(shared_cache.set, shared_verified_key(name), verified_at, shared_section_ttls[name])
+    except Exception as e:
+        logger.warning(f"Could not share verification of {name}: {e}")
+
+snapshot_refresher.on_verify = share_verification
+# Followers hold the leader's builds; the leader (or a lone process) writes the file
+snapshot_refresher.should_persist = lambda: not is_follower()
+
+def change_notice_key(section: str) -> str:
+    """Shared-store key through which a follower hands a change notification to the leader"""
+    return f"odoo_change:{section}"
+
+def take_change_notice(section: str) -> bool:
+    """Consume a pending change notification for a section left by another worker"""
+    if shared_cache is None or shared_cache.get(change_notice_key(section)) is None:
+        return False
+    shared_cache.delete(change_notice_key(section))
+    return True
+
+# One write_date probe per (Odoo instance, model), shared by every section reading the model
+SNAPSHOT_PROBE_MAX_AGE = float(os.getenv("SNAPSHOT_PROBE_MAX_AGE", "30"))
+change_probes: Dict[Tuple[str, str], ChangeProbe] = {}
+
+def section_change_probe(name: str) -> Callable[[], Awaitable[bool]]:
+    """Async probe for a section's models; followers always re-read the shared store instead"""
+    client, models = SNAPSHOT_SECTION_MODELS[name]
+    watch = ChangeWatch(
+        change_probes.setdefault((client.label, model), ChangeProbe(client, model, SNAPSHOT_PROBE_MAX_AGE))
+        for model in models
+    )
+
+    async def changed():
+        if is_follower():
+            return True
+        notified = await asyncio.to_thread(take_change_notice, name)
+        return await client.run_async(watch.changed) or notified
+    return changed
+
+for name, loader in {
+    "forwarding_orders": odoo_api.get_forwarding_orders_train_data_async,
+    "first_mile_truck": odoo_api.get_first_mile_truck_data_async,
+    "last_mile_icad": lambda: odoo_api.get_last_mile_truck_data_async("ICAD"),
+    "last_mile_dic": lambda: odoo_api.get_last_mile_truck_data_async("DIC"),
+    "stockpiles": odoo_api.get_stockpile_utilization_async,
+    "siji_loading_progress": odoo_api.get_siji_loading_progress_async,
+    "ruw_containers": odoo_api2.get_ruw_container_stats_async,
+    "all_locations_containers": odoo_api2.get_all_locations_container_stats_async,
+    "train_departures": odoo_api2.get_train_departures_async,
+}.items():
+    interval = float(os.getenv(f"SNAPSHOT_INTERVAL_{name.upper()}", SNAPSHOT_SECTION_INTERVALS[name]))
+    max_interval = float(os.getenv(f"SNAPSHOT_MAX_INTERVAL_{name.upper()}", interval * SNAPSHOT_MAX_INTERVAL_FACTOR))
+    if not SNAPSHOT_CHANGE_PROBES_ENABLED:
+        max_interval = interval
+    snapshot_refresher.add_section(
+        name,
+        shared_section_loader(name, loader, max_interval),
+        interval,
+        probe=section_change_probe(name) if SNAPSHOT_CHANGE_PROBES_ENABLED else None,
+        max_interval=max_interval
+    )
+
+# Sections affected by a change to each Odoo model, for change notifications: the
+# background sections above plus cache-only ones computed on demand
+ODOO_MODEL_SECTIONS: Dict[str, List[str]] = {}
+for name, (_, models) in SNAPSHOT_SECTION_MODELS.items():
+    for model in models:
+        ODOO_MODEL_SECTIONS.setdefault(model, []).append(name)
+ODOO_MODEL_SECTIONS["x_first_mile_freight"].extend(["first_mile_range", "first_mile_trend"])
+ODOO_MODEL_SECTIONS["x_last_mile_freight"].append("last_mile_range")
+
+# Longest span accepted by the date-range endpoints
+MAX_DATE_RANGE_DAYS = 92
+
+# Default time budget for aggregate endpoints; sections still running after it are reported as timed out
+DASHBOARD_DEADLINE_MS = int(os.getenv("DASHBOARD_DEADLINE_MS", "8000"))
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     try:
         # Initialize database and create admin user
         await init_db()
+
+        # Answer from the last known good data (marked stale) until the first refresh lands
+        if SNAPSHOT_REFRESH_ENABLED:
+            snapshot_refresher.restore()
         
-        if odoo_api.authenticate():
+        if await odoo_api.authenticate_async():
             logger.info("Successfully connected to Odoo")
+            try:
+                await odoo_api.load_reference_data_async()
+            except Exception as e:
+                # Loaded lazily on first lookup instead
+                logger.warning(f"Could not preload Odoo reference data: {e}")
         else:
             logger.error("Failed to connect to Odoo")
+
+        if SNAPSHOT_REFRESH_ENABLED:
+            if leader_lease is not None:
+                # Lease checks run on worker threads; the refresher lives on the event loop
+                loop = asyncio.get_running_loop()
+                leader_lease.on_change = lambda leader: loop.call_soon_threadsafe(on_leadership_change, leader)
+                # Decide leadership before the first refresh round
+                await asyncio.to_thread(leader_lease.try_acquire)
+                leader_lease.start()
+            snapshot_refresher.start()
     except Exception as e:
         logger.error(f"Startup error: {e}")
     
     yield
     
-    # Shutdown (if needed)
+    # Shutdown
+    await snapshot_refresher.stop()
+    if leader_lease is not None:
+        # Hand over straight away instead of after the lease expires
+        await leader_lease.stop()
+    odoo_api.close()
+    odoo_api2.close()
+    if shared_cache is not None:
+        shared_cache.close()
     logger.info("Application shutdown")
 
 app = FastAPI(title="Terminal Dashboard API", version="1.0.0", lifespan=lifespan)
@@ -118,10 +368,20 @@ app.add_middleware(
 # Initialize Odoo API (moved to top of file)
 # odoo_api = OdooAPI()  # Already initialized globally above
 
+class OdooChangeNotification(BaseModel):
+    """Body sent by an Odoo automated action when records change"""
+    model: str
+    ids: List[int] = []
+
 class DashboardResponse(BaseModel):
     success: bool
     data: Dict[str, Any]
     timestamp: str
+    # Set when Odoo is unavailable and the last good result is served instead
+    stale: bool = False
+    age_seconds: Optional[float] = None
+    # Per-section status for aggregate endpoints: ok, stale, timeout or error
+    sections: Optional[Dict[str, Any]] = None
 
 @app.get("/")
 async def root():
@@ -132,7 +392,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test Odoo connection
-        odoo_connected = odoo_api.test_connection()
+        odoo_connected = await odoo_api.test_connection_async()
         return {
             "status": "healthy",
             "odoo_connected": odoo_connected,
@@ -471,264 +731,421 @@ async def change_password(
         logger.error(f"Error changing password: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.get("/api/dashboard/forwarding-orders", response_model=DashboardResponse)
+async def load_section(key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, Optional[float]]:
+    """
+    Compute a dashboard section, falling back to its last good result on failure
+    The key names the section and its parameters, never the caller. Sections
+    kept up to date by the background refresher are read from its snapshot;
+    others within their TTL are served from the shared response cache.
+    Returns (data, age_seconds); age_seconds is None when the data is fresh.
+    """
+    snapshot = snapshot_refresher.get(key)
+    if snapshot is not None:
+        data, age = snapshot
+        # Restored from disk, failing to refresh or overdue: served, but marked stale
+        return data, age if snapshot_refresher.is_stale(key) else None
+
+    cached = await response_cache.get_async(key)
+    if cached is not None:
+        return cached, None
+
+    try:
+        data = await loader()
+    except Exception as e:
+        cached = last_good.get(key)
+        if cached is None:
+            raise
+        data, age_seconds = cached
+        logger.warning(f"Serving stale {key} ({age_seconds:.0f}s old): {e}")
+        return data, age_seconds
+    last_good.put(key, data)
+    await response_cache.put_async(key, data)
+    return data, None
+
+def _consume_late_result(task: asyncio.Task):
+    """Retrieve the outcome of a section that finished after its deadline"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Late dashboard section failed: {task.exception()}")
+
+async def load_sections(
+    sections: Dict[str, Callable[[], Awaitable[Any]]],
+    deadline: Optional[float] = None
+) -> Dict[str, Tuple[str, Any, Optional[float]]]:
+    """
+    Run load_section for several sections concurrently, at most DASHBOARD_FANOUT_CONCURRENCY at once
+    Returns {name: (status, data, age_seconds)} where status is ok, stale, timeout or error.
+    Sections still running at the deadline (seconds) are served from their last good result
+    if there is one; they keep running so the next request finds a fresh value.
+    """
+    semaphore = asyncio.Semaphore(max(1, DASHBOARD_FANOUT_CONCURRENCY))
+
+    async def run(name: str, loader: Callable[[], Awaitable[Any]]):
+        async with semaphore:
+            return await load_section(name, loader)
+
+    tasks = {name: asyncio.ensure_future(run(name, loader)) for name, loader in sections.items()}
+    done, _ = await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for name, task in tasks.items():
+        if task in done:
+            if task.exception() is None:
+                data, age = task.result()
+                results[name] = ("ok" if age is None else "stale", data, age)
+            else:
+                logger.error(f"Error fetching dashboard section {name}: {task.exception()}")
+                results[name] = ("error", {"status": "error", "detail": str(task.exception())}, None)
+            continue
+
+        task.add_done_callback(_consume_late_result)
+        cached = last_good.get(name)
+        if cached is not None:
+            data, age = cached
+            results[name] = ("stale", data, age)
+        else:
+            results[name] = ("timeout", {"status": "timeout"}, None)
+        logger.warning(f"Dashboard section {name} missed its {deadline:.1f}s deadline")
+    return results
+
+def section_error(description: str, e: Exception) -> HTTPException:
+    """Map a section failure with no fallback to an HTTP error"""
+    logger.error(f"Error fetching {description}: {e}")
+    if isinstance(e, (CircuitOpenError, BulkheadFullError)):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return HTTPException(status_code=500, detail=str(e))
+
+def dashboard_response(data: Dict[str, Any], age_seconds: Optional[float] = None,
+                       sections: Optional[Dict[str, Any]] = None, success: bool = True) -> DashboardResponse:
+    return DashboardResponse(
+        success=success,
+        data=data,
+        timestamp=datetime.now().isoformat(),
+        stale=age_seconds is not None,
+        age_seconds=round(age_seconds, 1) if age_seconds is not None else None,
+        sections=sections
+    )
+
+def intermodal_response(data: Dict[str, Any], age_seconds: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        'success': True,
+        'data': data,
+        'timestamp': datetime.now().isoformat(),
+        'stale': age_seconds is not None,
+        'age_seconds': round(age_seconds, 1) if age_seconds is not None else None
+    }
+
+def window_cost(param: str, default: int, max_days: int) -> Callable[[Request], float]:
+    """
+    Cost of a query over the last N days, N read from the param query parameter:
+    one unit per two weeks requested
+    """
+    def cost(request: Request) -> float:
+        try:
+            days = int(request.query_params.get(param, default))
+        except ValueError:
+            days = default
+        # Longer windows are rejected by validation, don't charge for them
+        return 1 + min(max(days, 0), max_days) / 14
+    return cost
+
+def date_range_cost(request: Request) -> float:
+    """Date-range queries cost one unit per two weeks requested, like windowed queries"""
+    try:
+        days = (date.fromisoformat(request.query_params["end"]) - date.fromisoformat(request.query_params["start"])).days + 1
+    except (KeyError, ValueError):
+        days = 1
+    # Longer ranges are rejected by validation, don't charge for them
+    return 1 + min(max(days, 0), MAX_DATE_RANGE_DAYS) / 14
+
+def validate_date_range(start: date, end: date):
+    """Reject ranges that are reversed, too long or reach into the future (UAE time)"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_DATE_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_DATE_RANGE_DAYS} days")
+    if end > datetime.now(odoo_api.uae_tz).date():
+        raise HTTPException(status_code=400, detail="end must not be in the future")
+
+@app.get("/api/dashboard/forwarding-orders", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(1, require_visitor))])
 async def get_forwarding_orders_data(current_user: User = Depends(require_visitor)):
     """1st Item: Get forwarding orders train departure data (Requires at least Visitor role)"""
     try:
-        data = odoo_api.get_forwarding_orders_train_data()
-        return DashboardResponse(
-            success=True,
-            data=data,
-            timestamp=datetime.now().isoformat()
+        data, age = await load_section("forwarding_orders", odoo_api.get_forwarding_orders_train_data_async)
+        return dashboard_response(data, age)
+    except Exception as e:
+        raise section_error("forwarding orders data", e)
+
+@app.get("/api/dashboard/first-mile-truck", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(1, require_visitor))])
+async def get_first_mile_truck_data(
+    target_date: Optional[date] = Query(None, alias="date"),
+    current_user: User = Depends(require_visitor)
+):
+    """2nd Item: Get first mile truck orders data for NDP terminal, today or ?date= (Requires at least Visitor role)"""
+    if target_date is not None:
+        validate_date_range(target_date, target_date)
+    try:
+        data, age = await load_section(
+            ("first_mile_truck", target_date) if target_date else "first_mile_truck",
+            lambda: odoo_api.get_first_mile_truck_data_async(target_date)
         )
+        return dashboard_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching forwarding orders data: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("first mile truck data", e)
 
-@app.get("/api/dashboard/first-mile-truck", response_model=DashboardResponse)
-async def get_first_mile_truck_data(current_user: User = Depends(require_visitor)):
-    """2nd Item: Get first mile truck orders data for NDP terminal (Requires at least Visitor role)"""
+@app.get("/api/dashboard/first-mile-truck/range", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(date_range_cost, require_visitor))])
+async def get_first_mile_truck_range(
+    start: date,
+    end: date,
+    current_user: User = Depends(require_visitor)
+):
+    """Daily first mile totals for NDP between two dates inclusive (Requires at least Visitor role)"""
+    validate_date_range(start, end)
     try:
-        data = odoo_api.get_first_mile_truck_data()
-        return DashboardResponse(
-            success=True,
-            data=data,
-            timestamp=datetime.now().isoformat()
+        data, age = await load_section(
+            ("first_mile_range", start, end),
+            lambda: odoo_api.get_first_mile_truck_range_async(start, end)
+        )
+        return dashboard_response(data, age)
+    except Exception as e:
+        raise section_error("first mile truck range", e)
+
+@app.get("/api/dashboard/first-mile-truck/trend", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(window_cost("days", 7, MAX_DATE_RANGE_DAYS), require_visitor))])
+async def get_first_mile_truck_trend(
+    days: int = Query(7, ge=1, le=MAX_DATE_RANGE_DAYS),
+    current_user: User = Depends(require_visitor)
+):
+    """Daily first mile totals for NDP over the last N days, e.g. 7 or 30 for trend lines (Requires at least Visitor role)"""
+    try:
+        data, age = await load_section(
+            ("first_mile_trend", days),
+            lambda: odoo_api.get_first_mile_trend_async(days)
         )
+        return dashboard_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching first mile truck data: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("first mile truck trend", e)
 
-@app.get("/api/dashboard/last-mile-truck/{terminal}", response_model=DashboardResponse)
-async def get_last_mile_truck_data(terminal: str, current_user: User = Depends(require_visitor)):
-    """3rd & 4th Item: Get last mile truck orders data for ICAD/DIC terminal (Requires at least Visitor role)"""
+@app.get("/api/dashboard/last-mile-truck/{terminal}", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(1, require_visitor))])
+async def get_last_mile_truck_data(
+    terminal: str,
+    target_date: Optional[date] = Query(None, alias="date"),
+    current_user: User = Depends(require_visitor)
+):
+    """3rd & 4th Item: Get last mile truck orders data for ICAD/DIC terminal, today or ?date= (Requires at least Visitor role)"""
     if terminal not in ['ICAD', 'DIC']:
         raise HTTPException(status_code=400, detail="Terminal must be ICAD or DIC")
+    if target_date is not None:
+        validate_date_range(target_date, target_date)
     
     try:
-        data = odoo_api.get_last_mile_truck_data(terminal)
-        return DashboardResponse(
-            success=True,
-            data=data,
-            timestamp=datetime.now().isoformat()
+        section = f"last_mile_{terminal.lower()}"
+        data, age = await load_section(
+            (section, target_date) if target_date else section,
+            lambda: odoo_api.get_last_mile_truck_data_async(terminal, target_date)
+        )
+        return dashboard_response(data, age)
+    except Exception as e:
+        raise section_error(f"last mile truck data for {terminal}", e)
+
+@app.get("/api/dashboard/last-mile-truck/{terminal}/range", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(date_range_cost, require_visitor))])
+async def get_last_mile_truck_range(
+    terminal: str,
+    start: date,
+    end: date,
+    current_user: User = Depends(require_visitor)
+):
+    """Daily last mile totals for ICAD/DIC between two dates inclusive (Requires at least Visitor role)"""
+    if terminal not in ['ICAD', 'DIC']:
+        raise HTTPException(status_code=400, detail="Terminal must be ICAD or DIC")
+    validate_date_range(start, end)
+    try:
+        data, age = await load_section(
+            ("last_mile_range", terminal, start, end),
+            lambda: odoo_api.get_last_mile_truck_range_async(terminal, start, end)
         )
+        return dashboard_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching last mile truck data for {terminal}: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error(f"last mile truck range for {terminal}", e)
 
-@app.get("/api/dashboard/stockpiles", response_model=DashboardResponse)
+@app.get("/api/dashboard/stockpiles", response_model=DashboardResponse,
+         dependencies=[Depends(require_admission(2, require_executive))])
 async def get_stockpile_data(current_user: User = Depends(require_executive)):
     """5th Item: Get stockpile utilization data (Requires at least Executive role)"""
     try:
-        data = odoo_api.get_stockpile_utilization()
-        return DashboardResponse(
-            success=True,
-            data=data,
-            timestamp=datetime.now().isoformat()
-        )
+        data, age = await load_section("stockpiles", odoo_api.get_stockpile_utilization_async)
+        return dashboard_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching stockpile data: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("stockpile data", e)
 
-@app.get("/api/siji-loading-progress")
+@app.get("/api/siji-loading-progress", dependencies=[Depends(require_admission(1, require_visitor))])
 async def get_siji_loading_progress(current_user: User = Depends(require_visitor)):
     """Get most recent Siji train loading progress (Requires at least Visitor role)"""
     try:
-        # Query most recent Siji Train Departed or Draft
-        domain = [
-            ['x_studio_terminal', '=', 'Siji'],
-            ['x_studio_selection_field_572_1j09lmu81', 'in', ['Train Departed', 'Draft']]
-        ]
-        
-        records = odoo_api.execute_kw('x_rail_freight_order', 'search_read', [domain], {
-            'fields': [
-                'x_name',
-                'x_studio_departure_train_id',
-                'x_studio_selection_field_572_1j09lmu81',
-                'x_studio_date_of_loading',
-                'x_studio_loaded_wagons',
-                'x_studio_one2many_field_3qn_1j34hmlba',
-                'write_date',
-                'create_date'
-            ],
-            'order': 'create_date desc',
-            'limit': 1
-        })
-        
-        if not records:
-            return DashboardResponse(
-                success=True,
-                data={"error": "No Siji trains found with status 'Train Departed' or 'Draft'"},
-                timestamp=datetime.now().isoformat()
-            )
-        
-        train = records[0]
-        wagon_ids = train.get('x_studio_one2many_field_3qn_1j34hmlba', [])
-        
-        if not wagon_ids:
-            return DashboardResponse(
-                success=True,
-                data={
-                    'train_id': train.get('x_studio_departure_train_id', 'N/A'),
-                    'status': train.get('x_studio_selection_field_572_1j09lmu81', 'Unknown'),
-                    'loading_date': train.get('x_studio_date_of_loading'),
-                    'last_updated': train.get('write_date'),
-                    'materials': [],
-                    'overall': {
-                        'total_wagons': 0,
-                        'loaded': 0,
-                        'being_loaded': 0,
-                        'not_started': 0,
-                        'progress_percent': 0
-                    }
-                },
-                timestamp=datetime.now().isoformat()
-            )
-        
-        # Get wagon details
-        wagons = odoo_api.execute_kw('x_wagon_trip', 'search_read', 
-            [[['id', 'in', wagon_ids]]], {
-            'fields': ['x_name', 'x_studio_start_time', 'x_studio_end_time', 'x_studio_material']
-        })
-        
-        # Calculate stats per material
-        material_stats = {}
-        for wagon in wagons:
-            material = wagon.get('x_studio_material')
-            material_name = material[1] if material and isinstance(material, (list, tuple)) and len(material) > 1 else 'Unknown'
-            
-            if material_name not in material_stats:
-                material_stats[material_name] = {
-                    'total': 0, 'loaded': 0, 'being_loaded': 0, 'not_started': 0
-                }
-            
-            material_stats[material_name]['total'] += 1
-            
-            # Loaded: both start_time AND end_time are set
-            if wagon.get('x_studio_start_time') and wagon.get('x_studio_end_time'):
-                material_stats[material_name]['loaded'] += 1
-            # Being loaded: only start_time is set
-            elif wagon.get('x_studio_start_time'):
-                material_stats[material_name]['being_loaded'] += 1
-            # Not started: neither is set
-            else:
-                material_stats[material_name]['not_started'] += 1
-        
-        # Build response
-        materials = []
-        for name, stats in material_stats.items():
-            materials.append({
-                'name': name,
-                'total_wagons': stats['total'],
-                'loaded': stats['loaded'],
-                'being_loaded': stats['being_loaded'],
-                'not_started': stats['not_started'],
-                'progress_percent': round((stats['loaded'] / stats['total']) * 100, 1) if stats['total'] > 0 else 0
-            })
-        
-        total_wagons = len(wagons)
-        total_loaded = sum(s['loaded'] for s in material_stats.values())
-        total_being_loaded = sum(s['being_loaded'] for s in material_stats.values())
-        total_not_started = sum(s['not_started'] for s in material_stats.values())
-        
-        result = {
-            'train_id': train.get('x_studio_departure_train_id', 'N/A'),
-            'status': train.get('x_studio_selection_field_572_1j09lmu81', 'Unknown'),
-            'loading_date': train.get('x_studio_date_of_loading'),
-            'last_updated': train.get('write_date'),
-            'materials': materials,
-            'overall': {
-                'total_wagons': total_wagons,
-                'loaded': total_loaded,
-                'being_loaded': total_being_loaded,
-                'not_started': total_not_started,
-                'progress_percent': round((total_loaded / total_wagons) * 100, 1) if total_wagons > 0 else 0
-            }
-        }
-        
-        return DashboardResponse(
-            success=True,
-            data=result,
-            timestamp=datetime.now().isoformat()
-        )
-        
+        data, age = await load_section("siji_loading_progress", odoo_api.get_siji_loading_progress_async)
+        return dashboard_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching Siji loading progress: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("Siji loading progress", e)
 
 # ============================================================================
 # Intermodal Dashboard Endpoints (Odoo Config 2)
 # ============================================================================
 
-@app.get("/api/intermodal/containers/ruw")
+@app.get("/api/intermodal/containers/ruw", dependencies=[Depends(require_admission(1, require_operator))])
 async def get_ruw_containers(current_user: User = Depends(require_operator)):
     """Get container statistics for RUW location (Requires Operator or Admin role)"""
     try:
-        data = odoo_api2.get_ruw_container_stats()
-        return {
-            'success': True,
-            'data': data,
-            'timestamp': datetime.now().isoformat()
-        }
+        data, age = await load_section("ruw_containers", odoo_api2.get_ruw_container_stats_async)
+        return intermodal_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching RUW container stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("RUW container stats", e)
 
-@app.get("/api/intermodal/containers/all-locations")
+@app.get("/api/intermodal/containers/all-locations", dependencies=[Depends(require_admission(2, require_operator))])
 async def get_all_locations_containers(current_user: User = Depends(require_operator)):
     """Get container statistics for all locations (Requires Operator or Admin role)"""
     try:
-        data = odoo_api2.get_all_locations_container_stats()
-        return {
-            'success': True,
-            'data': data,
-            'timestamp': datetime.now().isoformat()
-        }
+        data, age = await load_section("all_locations_containers", odoo_api2.get_all_locations_container_stats_async)
+        return intermodal_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching all locations container stats: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("all locations container stats", e)
 
-@app.get("/api/intermodal/train-departures")
-async def get_train_departures(days: int = 14, current_user: User = Depends(require_operator)):
+@app.get("/api/intermodal/train-departures", dependencies=[Depends(require_admission(window_cost("days", 14, 365), require_operator))])
+async def get_train_departures(
+    days: int = Query(14, ge=1, le=365),
+    current_user: User = Depends(require_operator)
+):
     """Get train departure data for the last N days (Requires Operator or Admin role)"""
     try:
-        data = odoo_api2.get_train_departures(days)
-        return {
-            'success': True,
-            'data': data,
-            'timestamp': datetime.now().isoformat()
-        }
+        data, age = await load_section(
+            "train_departures" if days == 14 else ("train_departures", days),
+            lambda: odoo_api2.get_train_departures_async(days)
+        )
+        return intermodal_response(data, age)
     except Exception as e:
-        logger.error(f"Error fetching train departures: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("train departures", e)
 
 # ============================================================================
 # Dashboard Aggregation Endpoints
 # ============================================================================
 
-@app.get("/api/dashboard/all")
-async def get_all_dashboard_data(current_user: User = Depends(require_visitor)):
-    """Get all dashboard data in one request (Requires at least Visitor role)"""
+@app.get("/api/dashboard/all", dependencies=[Depends(require_admission(3, require_visitor))])
+async def get_all_dashboard_data(
+    deadline_ms: Optional[int] = Query(None, ge=100, le=60000),
+    current_user: User = Depends(require_visitor)
+):
+    """
+    Get all dashboard data in one request (Requires at least Visitor role)
+    Sections that miss the deadline come back as their last good value or {"status": "timeout"}
+    """
     try:
-        data = {
-            "forwarding_orders": odoo_api.get_forwarding_orders_train_data(),
-            "first_mile_truck": odoo_api.get_first_mile_truck_data(),
-            "last_mile_icad": odoo_api.get_last_mile_truck_data("ICAD"),
-            "last_mile_dic": odoo_api.get_last_mile_truck_data("DIC"),
+        sections = {
+            "forwarding_orders": odoo_api.get_forwarding_orders_train_data_async,
+            "first_mile_truck": odoo_api.get_first_mile_truck_data_async,
+            "last_mile_icad": lambda: odoo_api.get_last_mile_truck_data_async("ICAD"),
+            "last_mile_dic": lambda: odoo_api.get_last_mile_truck_data_async("DIC"),
         }
         
-        # Add stockpiles data only if user has executive+ role
+        # Add stockpiles data only if user has executive+ role. The role tier only
+        # decides which sections are assembled; cached sections are shared by all tiers.
         if auth_service.has_permission(current_user.role, UserRole.EXECUTIVE):
-            data["stockpiles"] = odoo_api.get_stockpile_utilization()
+            sections["stockpiles"] = odoo_api.get_stockpile_utilization_async
         
-        return DashboardResponse(
-            success=True,
-            data=data,
-            timestamp=datetime.now().isoformat()
+        # Sections run concurrently, so latency is that of the slowest one, capped by the deadline
+        deadline = (deadline_ms or DASHBOARD_DEADLINE_MS) / 1000
+        results = await load_sections(sections, deadline)
+        data = {name: section_data for name, (_, section_data, _) in results.items()}
+        statuses = {
+            name: {"status": section_status, "age_seconds": round(age, 1) if age is not None else None}
+            for name, (section_status, _, age) in results.items()
+        }
+        ages = [age for _, _, age in results.values() if age is not None]
+        
+        # The response is as stale as its oldest section
+        return dashboard_response(
+            data,
+            max(ages) if ages else None,
+            sections=statuses,
+            success=any(section_status in ("ok", "stale") for section_status, _, _ in results.values())
         )
     except Exception as e:
-        logger.error(f"Error fetching all dashboard data: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise section_error("all dashboard data", e)
+
+@app.get("/api/odoo/stats")
+async def get_odoo_stats(current_user: User = Depends(require_admin)):
+    """Connection, retry, circuit breaker, coalescing and cache counters (Admin only)"""
+    return {
+        "odoo": odoo_api.get_stats(),
+        "odoo2": odoo_api2.get_stats(),
+        "admission": admission_controller.stats(),
+        "response_cache": await response_cache.stats_async(),
+        "snapshots": snapshot_refresher.stats(),
+        "change_probes": {f"{label}:{model}": probe.stats() for (label, model), probe in change_probes.items()},
+        "leader": leader_lease.stats() if leader_lease is not None else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.delete("/api/odoo/day-cache")
+async def invalidate_day_cache(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Drop cached figures of closed days, e.g. after back-dated corrections in Odoo (Admin only)
+    Without start/end every cached day is dropped.
+    """
+    invalidated = odoo_api.day_cache.invalidate(start, end)
+    # Responses assembled from the dropped days must not outlive them
+    await response_cache.clear_async()
+    logger.info(f"Day cache invalidated by {current_user.username}: {invalidated} entries ({start or 'any'} to {end or 'any'})")
+    return {
+        "success": True,
+        "invalidated": invalidated,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/api/internal/odoo-changes", dependencies=[Depends(require_webhook_token)])
+async def receive_odoo_changes(change: OdooChangeNotification):
+    """
+    Change notification from Odoo (X-Webhook-Token required)
+    Only what depends on the model is invalidated: its cached reads, the closed
+    days the changed records fall on, and the affected sections, which the
+    refresh leader rebuilds straight away instead of waiting for its next poll.
+    """
+    sections = ODOO_MODEL_SECTIONS.get(change.model, [])
+    for client in (odoo_api, odoo_api2):
+        client.query_cache.invalidate_model(change.model)
+
+    invalidated_days = 0
+    try:
+        invalidated_days = await odoo_api.invalidate_changed_days_async(change.model, change.ids)
+    except Exception as e:
+        # Without the records' dates, the closed days stay cached until invalidated by hand
+        logger.warning(f"Could not read changed {change.model} records to invalidate their days: {e}")
+
+    refreshed = []
+    for section in sections:
+        await response_cache.invalidate_section_async(section)
+        if is_follower():
+            # Picked up by the leader on its next poll of the section
+            await asyncio.to_thread(shared_cache.set, change_notice_key(section), time.time(), 3600)
+        elif snapshot_refresher.request_refresh(section):
+            refreshed.append(section)
+
+    logger.info(f"Odoo change notification for {change.model} ({len(change.ids)} records): sections {sections or 'none'}")
+    return {
+        "success": True,
+        "model": change.model,
+        "records": len(change.ids),
+        "sections": sections,
+        "refreshing": refreshed,
+        "invalidated_days": invalidated_days,
+        "timestamp": datetime.now().isoformat()
+    }
 
 @app.get("/api/cors-test")
 async def cors_test():
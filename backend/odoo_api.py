@@ -1,79 +1,42 @@
-import os
-import xmlrpc.client
-from dotenv import load_dotenv
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta, timezone
 import logging
 
-# Load environment variables from parent directory
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+from odoo_client import OdooClient, many2one_id
+from odoo_reference import ReferenceData
 
 logger = logging.getLogger(__name__)
 
-class OdooAPI:
+class OdooAPI(OdooClient):
+    env_prefix = 'ODOO'
+    label = 'Odoo'
+
+    # Materials change rarely; forwarding order lookups by name only need to be
+    # as fresh as the dashboards that show them. Last mile totals are shared by the
+    # ICAD and DIC sections, which refresh independently of each other.
+    CACHE_TTLS = {
+        'x_material': 6 * 3600,
+        'x_fwo': 300,
+        'x_last_mile_freight.read_group': 15,
+    }
+
+    # Terminals of the last mile dashboard sections, fetched together
+    LAST_MILE_TERMINALS = ('ICAD', 'DIC')
+
     def __init__(self):
-        self.url = os.getenv('ODOO_URL')
-        self.db = os.getenv('ODOO_DB')
-        self.username = os.getenv('ODOO_USERNAME')
-        self.api_key = os.getenv('ODOO_API_KEY')
-        
-        if not all([self.url, self.db, self.username, self.api_key]):
-            raise ValueError("Missing required environment variables for Odoo connection")
-        
-        self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-        self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
-        self.uid = None
-        
-        # UAE timezone (UTC+4)
-        self.uae_tz = timezone(timedelta(hours=4))
-        
-    def authenticate(self):
-        """Authenticate with Odoo and get user ID"""
-        try:
-            self.uid = self.common.authenticate(self.db, self.username, self.api_key, {})
-            if not self.uid:
-                raise Exception("Authentication failed")
-            logger.info(f"Successfully authenticated with Odoo, UID: {self.uid}")
-            return True
-        except Exception as e:
-            logger.error(f"Authentication error: {e}")
-            return False
-    
-    def execute_kw(self, model: str, method: str, args: List = None, kwargs: Dict = None):
-        """Execute Odoo API call with error handling"""
-        if not self.uid:
-            if not self.authenticate():
-                raise Exception("Failed to authenticate with Odoo")
-        
-        try:
-            return self.models.execute_kw(
-                self.db, self.uid, self.api_key,
-                model, method,
-                args or [],
-                kwargs or {}
-            )
-        except Exception as e:
-            logger.error(f"Error executing {method} on {model}: {e}")
-            raise
-    
-    def test_connection(self):
-        """Test connection to Odoo"""
-        try:
-            if not self.uid:
-                return self.authenticate()
-            
-            # Try a simple query to test the connection
-            result = self.execute_kw('res.users', 'search_read', 
-                                   [[['id', '=', self.uid]]], 
-                                   {'fields': ['name'], 'limit': 1})
-            return bool(result)
-        except Exception as e:
-            logger.error(f"Connection test failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"API call failed: {e}")
-            raise
-    
+        super().__init__()
+        # Materials and FWO name -> id lookups served from memory
+        self.reference = ReferenceData(
+            self,
+            refresh_interval=float(self._setting('REFERENCE_REFRESH_INTERVAL', '300')),
+            full_reload_interval=float(self._setting('REFERENCE_FULL_RELOAD_INTERVAL', '86400')),
+            fwo_days=int(self._setting('REFERENCE_FWO_DAYS', '90')),
+            negative_ttl=float(self._setting('REFERENCE_NEGATIVE_TTL', '300'))
+        )
+
+    def get_stats(self):
+        return {**super().get_stats(), 'reference_data': self.reference.stats()}
+
     def get_date_ranges(self):
         """Get start dates for current week and last week (Monday 00:00) in UAE timezone"""
         # Get current time in UAE timezone
@@ -270,6 +233,7 @@ class OdooAPI:
             ['x_studio_actual_train_departure', '<', now_str]
         ]
         
+        # Bounded by the current second, so a cached copy could never be hit again
         orders = self.execute_kw(
             'x_fwo', 'search_read',
             [domain],
@@ -280,7 +244,8 @@ class OdooAPI:
                 'x_studio_origin_terminal',
                 'x_name',
                 'x_studio_train_id'
-            ]}
+            ]},
+            cache=False
         )
         
         # Enrich orders with weight data from freight
@@ -397,278 +362,240 @@ class OdooAPI:
             'orders': orders  # Add the raw orders list here
         }
     
-    def get_first_mile_truck_data(self, target_date: Optional[datetime.date] = None):
-        """2nd Item: First mile truck orders at NDP terminal today and yesterday"""
-        # If no date provided, use today
-        if target_date is None:
-            start_of_today, end_of_today = self.get_today_range()
-        else:
-            # Use the provided date
-            now_uae = datetime.now(self.uae_tz)
-            start_of_day_uae = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=self.uae_tz)
-            end_of_day_uae = datetime.combine(target_date, datetime.max.time()).replace(tzinfo=self.uae_tz)
-            
-            # Convert to UTC for Odoo queries
-            start_of_today = start_of_day_uae.astimezone(timezone.utc)
-            end_of_today = end_of_day_uae.astimezone(timezone.utc)
-        
-        # Get yesterday's range (relative to target date)
-        if target_date is None:
-            now_uae = datetime.now(self.uae_tz)
-            yesterday = now_uae - timedelta(days=1)
-        else:
-            yesterday_date_obj = target_date - timedelta(days=1)
-            yesterday = datetime.combine(yesterday_date_obj, datetime.min.time()).replace(tzinfo=self.uae_tz)
-        
-        yesterday_date = yesterday.date() if target_date is None else target_date - timedelta(days=1)
-        
-        start_of_yesterday_uae = datetime.combine(yesterday_date, datetime.min.time()).replace(tzinfo=self.uae_tz)
-        end_of_yesterday_uae = datetime.combine(yesterday_date, datetime.max.time()).replace(tzinfo=self.uae_tz)
-        
-        # Convert to UTC for Odoo queries
-        start_of_yesterday_utc = start_of_yesterday_uae.astimezone(timezone.utc)
-        end_of_yesterday_utc = end_of_yesterday_uae.astimezone(timezone.utc)
-        
-        # Get today's orders
-        today_domain = [
-            ['x_studio_terminal', '=', 'NDP'],
-            ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-out Completed', 'Train Departed', 'Exception']],
-            ['x_studio_actual_date_and_time_of_gate_out', '>=', start_of_today.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_actual_date_and_time_of_gate_out', '<=', end_of_today.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        today_orders = self.execute_kw(
-            'x_first_mile_freight', 'search_read',
-            [today_domain],
-            {'fields': ['x_studio_net_weight_ton', 'x_studio_actual_date_and_time_of_gate_out', 'x_studio_selection_field_1d4_1icdknqu2']}
+    def get_day_range(self, day: datetime.date):
+        """Get start and end of a UAE calendar day, converted to UTC for Odoo queries"""
+        start_of_day_uae = datetime.combine(day, datetime.min.time()).replace(tzinfo=self.uae_tz)
+        end_of_day_uae = datetime.combine(day, datetime.max.time()).replace(tzinfo=self.uae_tz)
+        return (
+            start_of_day_uae.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+            end_of_day_uae.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
         )
-        
-        # Get yesterday's orders
-        yesterday_domain = [
-            ['x_studio_terminal', '=', 'NDP'],
-            ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-out Completed', 'Train Departed', 'Exception']],
-            ['x_studio_actual_date_and_time_of_gate_out', '>=', start_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_actual_date_and_time_of_gate_out', '<=', end_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        yesterday_orders = self.execute_kw(
-            'x_first_mile_freight', 'search_read',
-            [yesterday_domain],
-            {'fields': ['x_studio_net_weight_ton', 'x_studio_actual_date_and_time_of_gate_out', 'x_studio_selection_field_1d4_1icdknqu2']}
+
+    def get_first_mile_days(self, days: List[datetime.date]):
+        """
+        NDP first mile trucks gated out and their net weight per UAE day
+        Closed days come from the day cache; the remaining days are answered by
+        one read_group bucketed by UAE day, so a 30-day trend costs the same
+        single round trip as today and yesterday.
+        """
+        totals = {}
+        missing = []
+        for day in days:
+            cached = self.day_cache.get(('first_mile', day)) if self.is_closed_day(day) else None
+            if cached is not None:
+                totals[day] = cached
+            else:
+                missing.append(day)
+        if not missing:
+            return totals
+
+        start, _ = self.get_day_range(min(missing))
+        _, end = self.get_day_range(max(missing))
+        groups = self.read_group(
+            'x_first_mile_freight',
+            [
+                ['x_studio_terminal', '=', 'NDP'],
+                ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-out Completed', 'Train Departed', 'Exception']],
+                ['x_studio_actual_date_and_time_of_gate_out', '>=', start],
+                ['x_studio_actual_date_and_time_of_gate_out', '<=', end]
+            ],
+            ['x_studio_net_weight_ton:sum'],
+            ['x_studio_actual_date_and_time_of_gate_out:day'],
+            day_buckets=True
         )
-        
-        # Calculate totals for today
-        total_orders_today = len(today_orders)
-        total_weight_today = sum(order.get('x_studio_net_weight_ton', 0) for order in today_orders)
-        
-        # Calculate totals for yesterday
-        total_orders_yesterday = len(yesterday_orders)
-        total_weight_yesterday = sum(order.get('x_studio_net_weight_ton', 0) for order in yesterday_orders)
-        
-        return {
-            'total_orders': total_orders_today,
-            'total_weight': total_weight_today,
-            'orders': today_orders,
-            'yesterday': {
-                'total_orders': total_orders_yesterday,
-                'total_weight': total_weight_yesterday,
-                'orders': yesterday_orders
+        fetched = {
+            self.group_day(group, 'x_studio_actual_date_and_time_of_gate_out:day'): {
+                'total_orders': group.get('__count', 0),
+                'total_weight': group.get('x_studio_net_weight_ton') or 0
             }
+            for group in groups
         }
-    
-    def get_last_mile_truck_data(self, terminal: str, target_date: Optional[datetime.date] = None):
-        """3rd & 4th Item: Last mile truck orders at ICAD/DIC terminal today and yesterday"""
-        # If no date provided, use today
-        if target_date is None:
-            start_of_today, end_of_today = self.get_today_range()
-        else:
-            # Use the provided date
-            now_uae = datetime.now(self.uae_tz)
-            start_of_day_uae = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=self.uae_tz)
-            end_of_day_uae = datetime.combine(target_date, datetime.max.time()).replace(tzinfo=self.uae_tz)
-            
-            # Convert to UTC for Odoo queries
-            start_of_today = start_of_day_uae.astimezone(timezone.utc)
-            end_of_today = end_of_day_uae.astimezone(timezone.utc)
-        
-        # Get yesterday's range (relative to target date)
-        if target_date is None:
-            now_uae = datetime.now(self.uae_tz)
-            yesterday = now_uae - timedelta(days=1)
-        else:
-            yesterday_date_obj = target_date - timedelta(days=1)
-            yesterday = datetime.combine(yesterday_date_obj, datetime.min.time()).replace(tzinfo=self.uae_tz)
-        
-        yesterday_date = yesterday.date() if target_date is None else target_date - timedelta(days=1)
-        
-        start_of_yesterday_uae = datetime.combine(yesterday_date, datetime.min.time()).replace(tzinfo=self.uae_tz)
-        end_of_yesterday_uae = datetime.combine(yesterday_date, datetime.max.time()).replace(tzinfo=self.uae_tz)
-        
-        # Convert to UTC for Odoo queries
-        start_of_yesterday_utc = start_of_yesterday_uae.astimezone(timezone.utc)
-        end_of_yesterday_utc = end_of_yesterday_uae.astimezone(timezone.utc)
-        
-        # Get today's orders (trips executed = gate-out completed)
-        today_domain = [
-            ['x_studio_terminal', '=', terminal],
-            ['x_studio_selection_field_Vik7G', 'in', ['Gate-out Completed', 'Order Completed and Closed']],
-            ['x_studio_actual_date_and_time_of_gate_out', '>=', start_of_today.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_actual_date_and_time_of_gate_out', '<=', end_of_today.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        today_orders = self.execute_kw(
-            'x_last_mile_freight', 'search_read',
-            [today_domain],
-            {'fields': ['x_studio_net_weight_ton', 'x_studio_actual_date_and_time_of_gate_out', 'x_studio_selection_field_Vik7G', 'x_studio_confirmed']}
-        )
-        
-        # Get confirmed orders with scheduled gate-in today
-        # This includes confirmed appointments regardless of whether trip has started
-        confirmed_today_domain = [
-            ['x_studio_terminal', '=', terminal],
-            ['x_studio_confirmed', '=', True],
-            ['x_studio_scheduled_truck_gate_in_date_time', '>=', start_of_today.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_scheduled_truck_gate_in_date_time', '<=', end_of_today.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        confirmed_orders_today = self.execute_kw(
-            'x_last_mile_freight', 'search_count',
-            [confirmed_today_domain]
-        )
-        
-        # Get yesterday's orders (trips executed = gate-out completed)
-        yesterday_domain = [
-            ['x_studio_terminal', '=', terminal],
-            ['x_studio_selection_field_Vik7G', 'in', ['Gate-out Completed', 'Order Completed and Closed']],
-            ['x_studio_actual_date_and_time_of_gate_out', '>=', start_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_actual_date_and_time_of_gate_out', '<=', end_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        yesterday_orders = self.execute_kw(
-            'x_last_mile_freight', 'search_read',
-            [yesterday_domain],
-            {'fields': ['x_studio_net_weight_ton', 'x_studio_actual_date_and_time_of_gate_out', 'x_studio_selection_field_Vik7G', 'x_studio_confirmed']}
+        for day in missing:
+            totals[day] = fetched.get(day, {'total_orders': 0, 'total_weight': 0})
+            if self.is_closed_day(day):
+                self.day_cache.put(('first_mile', day), totals[day])
+        return totals
+
+    def _read_last_mile_totals(self, terminals: List[str], first_day: datetime.date, last_day: datetime.date):
+        """Totals per (terminal, UAE day) from two read_groups on x_last_mile_freight"""
+        start, _ = self.get_day_range(first_day)
+        _, end = self.get_day_range(last_day)
+        # Trips executed = gate-out completed, with their net weight summed by Odoo
+        executed = self.read_group(
+            'x_last_mile_freight',
+            [
+                ['x_studio_terminal', 'in', terminals],
+                ['x_studio_selection_field_Vik7G', 'in', ['Gate-out Completed', 'Order Completed and Closed']],
+                ['x_studio_actual_date_and_time_of_gate_out', '>=', start],
+                ['x_studio_actual_date_and_time_of_gate_out', '<=', end]
+            ],
+            ['x_studio_net_weight_ton:sum'],
+            ['x_studio_terminal', 'x_studio_actual_date_and_time_of_gate_out:day'],
+            day_buckets=True
         )
-        
-        # Get confirmed orders with scheduled gate-in yesterday
-        confirmed_yesterday_domain = [
-            ['x_studio_terminal', '=', terminal],
-            ['x_studio_confirmed', '=', True],
-            ['x_studio_scheduled_truck_gate_in_date_time', '>=', start_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')],
-            ['x_studio_scheduled_truck_gate_in_date_time', '<=', end_of_yesterday_utc.strftime('%Y-%m-%d %H:%M:%S')]
-        ]
-        
-        confirmed_orders_yesterday = self.execute_kw(
-            'x_last_mile_freight', 'search_count',
-            [confirmed_yesterday_domain]
+        # Confirmed appointments with scheduled gate-in that day, whether or not the trip has started
+        confirmed = self.read_group(
+            'x_last_mile_freight',
+            [
+                ['x_studio_terminal', 'in', terminals],
+                ['x_studio_confirmed', '=', True],
+                ['x_studio_scheduled_truck_gate_in_date_time', '>=', start],
+                ['x_studio_scheduled_truck_gate_in_date_time', '<=', end]
+            ],
+            [],
+            ['x_studio_terminal', 'x_studio_scheduled_truck_gate_in_date_time:day'],
+            day_buckets=True
         )
-        
-        # Calculate totals for today
-        total_orders_today = len(today_orders)
-        total_weight_today = sum(order.get('x_studio_net_weight_ton', 0) for order in today_orders)
-        # confirmed_orders_today already calculated from separate query above
-        
-        # Calculate totals for yesterday
-        total_orders_yesterday = len(yesterday_orders)
-        total_weight_yesterday = sum(order.get('x_studio_net_weight_ton', 0) for order in yesterday_orders)
-        # confirmed_orders_yesterday already calculated from separate query above
-        
+
+        totals = {}
+        def entry(group, groupby):
+            terminal = group.get('x_studio_terminal')
+            if isinstance(terminal, (list, tuple)):
+                terminal = terminal[1]
+            key = (terminal, self.group_day(group, groupby))
+            return totals.setdefault(key, {'total_orders': 0, 'total_weight': 0, 'confirmed_orders': 0})
+
+        for group in executed:
+            totals_entry = entry(group, 'x_studio_actual_date_and_time_of_gate_out:day')
+            totals_entry['total_orders'] += group.get('__count', 0)
+            totals_entry['total_weight'] += group.get('x_studio_net_weight_ton') or 0
+        for group in confirmed:
+            entry(group, 'x_studio_scheduled_truck_gate_in_date_time:day')['confirmed_orders'] += group.get('__count', 0)
+        return totals
+
+    def get_last_mile_totals(self, terminals: List[str], days: List[datetime.date]):
+        """
+        Trips executed, net weight and confirmed appointments per (terminal, UAE day)
+        Closed days come from the day cache; all other terminals and days are
+        answered together by two read_group calls, so adding a terminal or a day
+        costs no extra round trips.
+        """
+        totals = {}
+        missing = []
+        for terminal in terminals:
+            for day in days:
+                cached = self.day_cache.get(('last_mile', terminal, day)) if self.is_closed_day(day) else None
+                if cached is not None:
+                    totals[(terminal, day)] = cached
+                else:
+                    missing.append((terminal, day))
+
+        if missing:
+            fetched = self._read_last_mile_totals(
+                sorted({terminal for terminal, _ in missing}),
+                min(day for _, day in missing),
+                max(day for _, day in missing)
+            )
+            for terminal, day in missing:
+                value = fetched.get((terminal, day), {'total_orders': 0, 'total_weight': 0, 'confirmed_orders': 0})
+                totals[(terminal, day)] = value
+                if self.is_closed_day(day):
+                    self.day_cache.put(('last_mile', terminal, day), value)
+        return totals
+
+    def invalidate_changed_days(self, model: str, ids: List[int]) -> int:
+        """
+        Drop cached closed days touched by changed freight records
+        Days are taken from the records' gate-out (and for last mile, scheduled
+        gate-in) times in UAE time; returns the number of cache entries dropped.
+        """
+        if model not in ('x_first_mile_freight', 'x_last_mile_freight') or not ids:
+            return 0
+        fields = ['x_studio_actual_date_and_time_of_gate_out']
+        if model == 'x_last_mile_freight':
+            fields.append('x_studio_scheduled_truck_gate_in_date_time')
+        records = self.execute_kw(model, 'read', [list(ids)], {'fields': fields})
+
+        days = set()
+        for record in records:
+            for field in fields:
+                if record.get(field):
+                    moment = datetime.strptime(record[field], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+                    days.add(moment.astimezone(self.uae_tz).date())
+        return sum(self.day_cache.invalidate(day, day) for day in days)
+
+    def get_first_mile_truck_data(self, target_date: Optional[datetime.date] = None):
+        """2nd Item: First mile truck orders at NDP terminal on target_date (default today) and the day before"""
+        day = target_date or datetime.now(self.uae_tz).date()
+        yesterday = day - timedelta(days=1)
+        totals = self.get_first_mile_days([yesterday, day])
+        return {**totals[day], 'yesterday': totals[yesterday]}
+
+    def get_first_mile_trend(self, days: int = 7):
+        """Daily NDP first mile totals for the last `days` UAE days, today included"""
+        today = datetime.now(self.uae_tz).date()
+        return self.get_first_mile_truck_range(today - timedelta(days=days - 1), today)
+
+    def get_last_mile_truck_data(self, terminal: str, target_date: Optional[datetime.date] = None):
+        """3rd & 4th Item: Last mile truck orders at ICAD/DIC terminal on target_date (default today) and the day before"""
+        # Every dashboard terminal is fetched in the same calls, so the other
+        # terminal's section is served by the query cache or a coalesced call
+        terminals = list(dict.fromkeys([*self.LAST_MILE_TERMINALS, terminal]))
+        return self.get_last_mile_truck_data_multi(terminals, target_date)[terminal]
+
+    def get_last_mile_truck_data_multi(self, terminals: List[str], target_date: Optional[datetime.date] = None):
+        """Last mile figures of several terminals on target_date (default today) and the day before, keyed by terminal"""
+        day = target_date or datetime.now(self.uae_tz).date()
+        yesterday = day - timedelta(days=1)
+        totals = self.get_last_mile_totals(terminals, [yesterday, day])
+        return {
+            terminal: {**totals[(terminal, day)], 'terminal': terminal, 'yesterday': totals[(terminal, yesterday)]}
+            for terminal in terminals
+        }
+
+    def get_first_mile_truck_range(self, start_date: datetime.date, end_date: datetime.date):
+        """Daily NDP first mile totals for every day from start_date to end_date inclusive"""
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        totals = self.get_first_mile_days(days)
+        return {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': [{'date': day.isoformat(), **totals[day]} for day in days]
+        }
+
+    def get_last_mile_truck_range(self, terminal: str, start_date: datetime.date, end_date: datetime.date):
+        """Daily last mile totals at ICAD/DIC for every day from start_date to end_date inclusive"""
+        days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        totals = self.get_last_mile_totals([terminal], days)
         return {
-            'total_orders': total_orders_today,
-            'total_weight': total_weight_today,
-            'confirmed_orders': confirmed_orders_today,
-            'orders': today_orders,
             'terminal': terminal,
-            'yesterday': {
-                'total_orders': total_orders_yesterday,
-                'total_weight': total_weight_yesterday,
-                'confirmed_orders': confirmed_orders_yesterday,
-                'orders': yesterday_orders
-            }
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'days': [{'date': day.isoformat(), **totals[(terminal, day)]} for day in days]
         }
-    
+
     def get_stockpile_utilization(self):
         """5th Item: Stockpile utilization for ICAD, DIC and NDP terminals"""
-        try:
-            # Fetch stockpile records
-            stockpiles = self.execute_kw(
-                'x_stockpile', 'search_read',
-                [[]],  # Empty domain to get all records
-                {
-                    'limit': 50,
-                    'fields': [
-                        'id', 'x_name', 'display_name', 'x_studio_capacity',
-                        'x_studio_quantity_in_stock_t', 'x_studio_terminal',
-                        'x_studio_stockpile_material_age', 'x_studio_material',
-                        'x_studio_show_in_dashboard', 'x_studio_last_fwo',
-                        'x_studio_silo_loading', 'x_studio_last_ordered_destination',
-                        'x_studio_last_fwo_etd', 'x_studio_last_fwo_planned_quantity',
-                        'x_studio_last_fwo_planned_fm_transporter'
-                    ]
-                }
-            )
-            
-            if not stockpiles:
-                logger.warning("No stockpile records found")
-                raise Exception("No stockpile records exist")
-            
-            logger.info(f"Fetched {len(stockpiles)} stockpile records")
-                
-        except Exception as e:
-            logger.error(f"Error fetching stockpiles: {e}")
-            logger.info("Returning mock data due to stockpile fetch failure")
-            # Return mock data for demonstration purposes
-            return {
-                'ICAD': [
-                    {
-                        'name': 'ICAD-SP-01 (Demo)',
-                        'capacity': 1000.0,
-                        'quantity': 750.0,
-                        'material_name': 'Iron Ore (Demo)',
-                        'material_age_hours': 24.5,
-                        'utilization_percent': 75.0
-                    },
-                    {
-                        'name': 'ICAD-SP-02 (Demo)',
-                        'capacity': 1200.0,
-                        'quantity': 960.0,
-                        'material_name': 'Coal (Demo)',
-                        'material_age_hours': 48.2,
-                        'utilization_percent': 80.0
-                    },
-                    {
-                        'name': 'ICAD-SP-03 (Demo)',
-                        'capacity': 800.0,
-                        'quantity': 320.0,
-                        'material_name': 'Limestone (Demo)',
-                        'material_age_hours': 12.8,
-                        'utilization_percent': 40.0
-                    }
-                ],
-                'DIC': [
-                    {
-                        'name': 'DIC-SP-01 (Demo)',
-                        'capacity': 1500.0,
-                        'quantity': 1350.0,
-                        'material_name': 'Iron Ore (Demo)',
-                        'material_age_hours': 36.1,
-                        'utilization_percent': 90.0
-                    },
-                    {
-                        'name': 'DIC-SP-02 (Demo)',
-                        'capacity': 1000.0,
-                        'quantity': 600.0,
-                        'material_name': 'Coal (Demo)',
-                        'material_age_hours': 72.5,
-                        'utilization_percent': 60.0
-                    }
+        # Fetch stockpile records. Failures propagate so the endpoint can serve the
+        # last good result instead of made-up data.
+        stockpiles = self.execute_kw(
+            'x_stockpile', 'search_read',
+            [[]],  # Empty domain to get all records
+            {
+                'limit': 50,
+                'fields': [
+                    'id', 'x_name', 'display_name', 'x_studio_capacity',
+                    'x_studio_quantity_in_stock_t', 'x_studio_terminal',
+                    'x_studio_stockpile_material_age', 'x_studio_material',
+                    'x_studio_show_in_dashboard', 'x_studio_last_fwo',
+                    'x_studio_silo_loading', 'x_studio_last_ordered_destination',
+                    'x_studio_last_fwo_etd', 'x_studio_last_fwo_planned_quantity',
+                    'x_studio_last_fwo_planned_fm_transporter'
                 ]
             }
+        )
+        
+        if not stockpiles:
+            logger.warning("No stockpile records found")
+        else:
+            logger.info(f"Fetched {len(stockpiles)} stockpile records")
         
         # Group by terminal
         icad_stockpiles = []
         dic_stockpiles = []
         ndp_stockpiles = []
+        # (stockpile_data, last_fwo, material_id) of NDP silos that need truck figures
+        truck_lookups = []
         
         for stockpile in stockpiles:
             # Check if stockpile should be shown in dashboard
@@ -699,13 +626,7 @@ class OdooAPI:
                         material_id = material_field
                         if isinstance(material_id, list):
                             material_id = material_id[0]
-                        material = self.execute_kw(
-                            'x_material', 'read',
-                            [[material_id]],
-                            {'fields': ['x_name', 'name']}
-                        )
-                        if material:
-                            material_name = material[0].get('x_name') or material[0].get('name', 'Unknown')
+                        material_name = self.reference.material_name(material_id)
                     except:
                         material_name = 'Unknown'
             
@@ -772,86 +693,12 @@ class OdooAPI:
                 else:
                     stockpile_data['last_fwo_planned_transporter'] = 'N/A'
                 
-                # Fetch truck data for this stockpile
+                # Truck figures are filled in below with batched queries for all silos
+                stockpile_data['truck_completed_count'] = 0
+                stockpile_data['first_truck_gate_in'] = 'N/A'
                 if last_fwo and material_id and last_fwo != 'N/A':
-                    try:
-                        # First, get the forwarding order ID by name
-                        fwo_records = self.execute_kw(
-                            'x_fwo', 'search_read',
-                            [[['x_name', '=', last_fwo]]],
-                            {'fields': ['id', 'x_name'], 'limit': 1}
-                        )
-                        
-                        if fwo_records and len(fwo_records) > 0:
-                            fwo_id = fwo_records[0]['id']
-                            
-                            # Query for truck completed count
-                            # Condition 1: x_studio_forwarding_order_selectable.x_name = last_fwo (using fwo_id)
-                            # Condition 2: x_studio_material = material_id
-                            # Condition 3: x_studio_selection_field_1d4_1icdknqu2 in ['Gate-out Completed', 'Train Departed']
-                            truck_completed_domain = [
-                                ['x_studio_forwarding_order_selectable', '=', fwo_id],
-                                ['x_studio_material', '=', material_id],
-                                ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-out Completed', 'Train Departed']]
-                            ]
-                            
-                            truck_completed_count = self.execute_kw(
-                                'x_first_mile_freight', 'search_count',
-                                [truck_completed_domain]
-                            )
-                            stockpile_data['truck_completed_count'] = truck_completed_count
-                            
-                            # Debug logging
-                            logger.info(f"Stockpile {name} - Order: {last_fwo}, Material ID: {material_id}, Completed Trucks: {truck_completed_count}")
-                            
-                            # Query for first truck (earliest gate-in)
-                            # Condition 1: x_studio_forwarding_order_selectable.x_name = last_fwo (using fwo_id)
-                            # Condition 2: x_studio_material = material_id
-                            # Condition 3: x_studio_selection_field_1d4_1icdknqu2 in ['Gate-in Completed', 'Gate-out Completed', 'Train Departed']
-                            # Condition 4: Order by x_studio_actual_date_and_time_of_gate_in (earliest)
-                            first_truck_domain = [
-                                ['x_studio_forwarding_order_selectable', '=', fwo_id],
-                                ['x_studio_material', '=', material_id],
-                                ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-in Completed', 'Gate-out Completed', 'Train Departed']],
-                                ['x_studio_actual_date_and_time_of_gate_in', '!=', False]
-                            ]
-                            
-                            first_truck_records = self.execute_kw(
-                                'x_first_mile_freight', 'search_read',
-                                [first_truck_domain],
-                                {
-                                    'fields': ['x_studio_actual_date_and_time_of_gate_in', 'x_name'],
-                                    'limit': 1,
-                                    'order': 'x_studio_actual_date_and_time_of_gate_in asc'
-                                }
-                            )
-                            
-                            if first_truck_records and len(first_truck_records) > 0:
-                                first_truck_time = first_truck_records[0].get('x_studio_actual_date_and_time_of_gate_in', 'N/A')
-                                first_truck_name = first_truck_records[0].get('x_name', 'N/A')
-                                stockpile_data['first_truck_gate_in'] = str(first_truck_time) if first_truck_time else 'N/A'
-                                
-                                # Debug logging
-                                logger.info(f"Stockpile {name} - First Truck: {first_truck_name}, Gate-in: {first_truck_time}")
-                            else:
-                                stockpile_data['first_truck_gate_in'] = 'N/A'
-                                logger.info(f"Stockpile {name} - No first truck found matching criteria")
-                        else:
-                            # FWO not found
-                            logger.warning(f"Forwarding order '{last_fwo}' not found for stockpile {name}")
-                            stockpile_data['truck_completed_count'] = 0
-                            stockpile_data['first_truck_gate_in'] = 'N/A'
-                            
-                    except Exception as e:
-                        logger.error(f"Error fetching truck data for stockpile {name}: {e}")
-                        stockpile_data['truck_completed_count'] = 0
-                        stockpile_data['first_truck_gate_in'] = 'N/A'
-                else:
-                    stockpile_data['truck_completed_count'] = 0
-                    stockpile_data['first_truck_gate_in'] = 'N/A'
-
+                    truck_lookups.append((stockpile_data, str(last_fwo), material_id))
 
-            
             if 'ICAD' in str(terminal).upper():
                 icad_stockpiles.append(stockpile_data)
             elif 'DIC' in str(terminal).upper():
@@ -861,9 +708,207 @@ class OdooAPI:
             else:
                 # Log unknown terminals for debugging
                 logger.warning(f"Unknown terminal '{terminal}' for stockpile {name}")
+
+        if truck_lookups:
+            try:
+                self._fill_silo_truck_data(truck_lookups)
+            except Exception as e:
+                # Silos keep the zero / N/A defaults
+                logger.error(f"Error fetching truck data for NDP stockpiles: {e}")
         
         return {
             'ICAD': icad_stockpiles,
             'DIC': dic_stockpiles,
             'NDP': ndp_stockpiles
         }
+
+    def _fill_silo_truck_data(self, lookups: List[tuple]):
+        """
+        Completed truck count and first gate-in for each NDP silo's last FWO and material
+        Two queries whatever the number of silos: one x_fwo lookup for all FWO names
+        (usually answered from reference data) and one read_group on
+        x_first_mile_freight grouped by forwarding order, material and state.
+        - truck_completed_count: trucks in 'Gate-out Completed' or 'Train Departed'
+        - first_truck_gate_in: earliest gate-in of trucks that are gated in or later
+        """
+        fwo_ids = self.reference.fwo_id_map([last_fwo for _, last_fwo, _ in lookups])
+        for stockpile_data, last_fwo, _ in lookups:
+            if fwo_ids.get(last_fwo) is None:
+                logger.warning(f"Forwarding order '{last_fwo}' not found for stockpile {stockpile_data['name']}")
+
+        pairs = {(fwo_ids[last_fwo], material_id) for _, last_fwo, material_id in lookups if fwo_ids.get(last_fwo)}
+        if not pairs:
+            return
+        groups = self.read_group(
+            'x_first_mile_freight',
+            [
+                ['x_studio_forwarding_order_selectable', 'in', sorted({fwo_id for fwo_id, _ in pairs})],
+                ['x_studio_material', 'in', sorted({material_id for _, material_id in pairs})],
+                ['x_studio_selection_field_1d4_1icdknqu2', 'in', ['Gate-in Completed', 'Gate-out Completed', 'Train Departed']]
+            ],
+            ['x_studio_actual_date_and_time_of_gate_in:min'],
+            ['x_studio_forwarding_order_selectable', 'x_studio_material', 'x_studio_selection_field_1d4_1icdknqu2']
+        )
+
+        completed: Dict[tuple, int] = {}
+        first_gate_in: Dict[tuple, str] = {}
+        for group in groups:
+            # The domain is a cross product of FWOs and materials; keep only the silos' pairs
+            pair = (many2one_id(group.get('x_studio_forwarding_order_selectable')),
+                    many2one_id(group.get('x_studio_material')))
+            if pair not in pairs:
+                continue
+            if group.get('x_studio_selection_field_1d4_1icdknqu2') in ('Gate-out Completed', 'Train Departed'):
+                completed[pair] = completed.get(pair, 0) + group.get('__count', 0)
+            gate_in = group.get('x_studio_actual_date_and_time_of_gate_in')
+            if gate_in and (pair not in first_gate_in or gate_in < first_gate_in[pair]):
+                first_gate_in[pair] = gate_in
+
+        for stockpile_data, last_fwo, material_id in lookups:
+            pair = (fwo_ids.get(last_fwo), material_id)
+            stockpile_data['truck_completed_count'] = completed.get(pair, 0)
+            stockpile_data['first_truck_gate_in'] = str(first_gate_in[pair]) if pair in first_gate_in else 'N/A'
+            logger.debug(f"Stockpile {stockpile_data['name']} - Order: {last_fwo}, Material ID: {material_id}, "
+                         f"Completed Trucks: {stockpile_data['truck_completed_count']}, First gate-in: {stockpile_data['first_truck_gate_in']}")
+
+    def get_siji_loading_progress(self):
+        """Loading progress of the most recent Siji train, per material and overall"""
+        # Query most recent Siji Train Departed or Draft
+        domain = [
+            ['x_studio_terminal', '=', 'Siji'],
+            ['x_studio_selection_field_572_1j09lmu81', 'in', ['Train Departed', 'Draft']]
+        ]
+        
+        records = self.execute_kw('x_rail_freight_order', 'search_read', [domain], {
+            'fields': [
+                'x_name',
+                'x_studio_departure_train_id',
+                'x_studio_selection_field_572_1j09lmu81',
+                'x_studio_date_of_loading',
+                'x_studio_loaded_wagons',
+                'x_studio_one2many_field_3qn_1j34hmlba',
+                'write_date',
+                'create_date'
+            ],
+            'order': 'create_date desc',
+            'limit': 1
+        })
+        
+        if not records:
+            return {"error": "No Siji trains found with status 'Train Departed' or 'Draft'"}
+        
+        train = records[0]
+        wagon_ids = train.get('x_studio_one2many_field_3qn_1j34hmlba', [])
+        
+        if not wagon_ids:
+            return {
+                'train_id': train.get('x_studio_departure_train_id', 'N/A'),
+                'status': train.get('x_studio_selection_field_572_1j09lmu81', 'Unknown'),
+                'loading_date': train.get('x_studio_date_of_loading'),
+                'last_updated': train.get('write_date'),
+                'materials': [],
+                'overall': {
+                    'total_wagons': 0,
+                    'loaded': 0,
+                    'being_loaded': 0,
+                    'not_started': 0,
+                    'progress_percent': 0
+                }
+            }
+        
+        # Get wagon details
+        wagons = self.execute_kw('x_wagon_trip', 'search_read', 
+            [[['id', 'in', wagon_ids]]], {
+            'fields': ['x_name', 'x_studio_start_time', 'x_studio_end_time', 'x_studio_material']
+        })
+        
+        # Calculate stats per material
+        material_stats = {}
+        for wagon in wagons:
+            material = wagon.get('x_studio_material')
+            material_name = material[1] if material and isinstance(material, (list, tuple)) and len(material) > 1 else 'Unknown'
+            
+            if material_name not in material_stats:
+                material_stats[material_name] = {
+                    'total': 0, 'loaded': 0, 'being_loaded': 0, 'not_started': 0
+                }
+            
+            material_stats[material_name]['total'] += 1
+            
+            # Loaded: both start_time AND end_time are set
+            if wagon.get('x_studio_start_time') and wagon.get('x_studio_end_time'):
+                material_stats[material_name]['loaded'] += 1
+            # Being loaded: only start_time is set
+            elif wagon.get('x_studio_start_time'):
+                material_stats[material_name]['being_loaded'] += 1
+            # Not started: neither is set
+            else:
+                material_stats[material_name]['not_started'] += 1
+        
+        # Build response
+        materials = []
+        for name, stats in material_stats.items():
+            materials.append({
+                'name': name,
+                'total_wagons': stats['total'],
+                'loaded': stats['loaded'],
+                'being_loaded': stats['being_loaded'],
+                'not_started': stats['not_started'],
+                'progress_percent': round((stats['loaded'] / stats['total']) * 100, 1) if stats['total'] > 0 else 0
+            })
+        
+        total_wagons = len(wagons)
+        total_loaded = sum(s['loaded'] for s in material_stats.values())
+        total_being_loaded = sum(s['being_loaded'] for s in material_stats.values())
+        total_not_started = sum(s['not_started'] for s in material_stats.values())
+        
+        result = {
+            'train_id': train.get('x_studio_departure_train_id', 'N/A'),
+            'status': train.get('x_studio_selection_field_572_1j09lmu81', 'Unknown'),
+            'loading_date': train.get('x_studio_date_of_loading'),
+            'last_updated': train.get('write_date'),
+            'materials': materials,
+            'overall': {
+                'total_wagons': total_wagons,
+                'loaded': total_loaded,
+                'being_loaded': total_being_loaded,
+                'not_started': total_not_started,
+                'progress_percent': round((total_loaded / total_wagons) * 100, 1) if total_wagons > 0 else 0
+            }
+        }
+        
+        return result
+
+    # ------------------------------------------------------------------
+    # Async mirrors used by the FastAPI endpoints
+    # ------------------------------------------------------------------
+
+    async def load_reference_data_async(self):
+        return await self.run_async(self.reference.load)
+
+    async def get_forwarding_orders_train_data_async(self):
+        return await self.run_async(self.get_forwarding_orders_train_data)
+
+    async def get_first_mile_truck_data_async(self, target_date: Optional[datetime.date] = None):
+        return await self.run_async(self.get_first_mile_truck_data, target_date)
+
+    async def get_last_mile_truck_data_async(self, terminal: str, target_date: Optional[datetime.date] = None):
+        return await self.run_async(self.get_last_mile_truck_data, terminal, target_date)
+
+    async def invalidate_changed_days_async(self, model: str, ids: List[int]):
+        return await self.run_async(self.invalidate_changed_days, model, ids)
+
+    async def get_first_mile_trend_async(self, days: int = 7):
+        return await self.run_async(self.get_first_mile_trend, days)
+
+    async def get_first_mile_truck_range_async(self, start_date: datetime.date, end_date: datetime.date):
+        return await self.run_async(self.get_first_mile_truck_range, start_date, end_date)
+
+    async def get_last_mile_truck_range_async(self, terminal: str, start_date: datetime.date, end_date: datetime.date):
+        return await self.run_async(self.get_last_mile_truck_range, terminal, start_date, end_date)
+
+    async def get_stockpile_utilization_async(self):
+        return await self.run_async(self.get_stockpile_utilization)
+
+    async def get_siji_loading_progress_async(self):
+        return await self.run_async(self.get_siji_loading_progress)
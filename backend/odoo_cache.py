@@ -0,0 +1,233 @@
+"""
+Memoization of Odoo read calls
+
+QueryCache sits in front of execute_kw and keeps results of read methods for
+a TTL chosen per model and method, e.g. x_material for hours and x_fwo for
+minutes. Calls are canonicalised first, so the same query written with a
+different kwargs, domain or field order shares one entry. Write methods are
+never cached; they invalidate the cached reads of their model instead.
+
+DayCache keeps per-day figures for days that have closed, without expiry.
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+DOMAIN_OPERATORS = ('&', '|', '!')
+
+def _json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+def _sorted_unique(values: List) -> List:
+    """Sort a list of JSON-able values and drop duplicates"""
+    unique = {_json(v): v for v in values}
+    return [unique[k] for k in sorted(unique)]
+
+def normalize_domain(domain: Any) -> Any:
+    """
+    Canonical form of a search domain
+    Leaves become lists, values of 'in'/'not in' are sorted, and the leaves of a
+    plain (implicitly AND-ed) domain are sorted. Domains using prefix operators
+    keep their order, since it carries meaning there.
+    """
+    if not isinstance(domain, (list, tuple)):
+        return domain
+    terms = []
+    for term in domain:
+        if isinstance(term, (list, tuple)) and len(term) == 3:
+            field, operator, value = term
+            if operator in ('in', 'not in') and isinstance(value, (list, tuple)):
+                value = _sorted_unique(value)
+            terms.append([field, operator, value])
+        else:
+            terms.append(term)
+    if any(term in DOMAIN_OPERATORS for term in terms if isinstance(term, str)):
+        return terms
+    return sorted(terms, key=_json)
+
+def normalize_fields(fields: Any) -> Any:
+    """Field lists are order-insensitive for reads"""
+    if isinstance(fields, (list, tuple)):
+        return sorted(set(fields))
+    return fields
+
+def canonical_call(method: str, args: Optional[List], kwargs: Optional[Dict]) -> Tuple[List, Dict]:
+    """
+    Canonical (args, kwargs) of a read call
+    Only positions whose order does not affect the result are normalised:
+    domains and field lists, never ids (read returns records in id order given)
+    or read_group's groupby.
+    """
+    args = list(args or [])
+    kwargs = dict(kwargs or {})
+
+    if method in ('search', 'search_read', 'search_count', 'read_group') and args:
+        args[0] = normalize_domain(args[0])
+    if 'domain' in kwargs:
+        kwargs['domain'] = normalize_domain(kwargs['domain'])
+
+    if method in ('read', 'read_group') and len(args) > 1:
+        args[1] = normalize_fields(args[1])
+    if 'fields' in kwargs:
+        kwargs['fields'] = normalize_fields(kwargs['fields'])
+    return args, kwargs
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """Parse 'x_material=21600,x_fwo.search_read=300' into {pattern: seconds}"""
+    ttls = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        pattern, seconds = item.split('=', 1)
+        ttls[pattern.strip()] = float(seconds)
+    return ttls
+
+class QueryCache:
+    """
+    LRU cache of read results, bounded by entry count and approximate bytes
+    TTLs are looked up as 'model.method', then 'model', then default_ttl; a TTL
+    of 0 disables caching for that call. Values are deep-copied in and out
+    because callers post-process Odoo records in place.
+    """
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 0.0,
+                 max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, expires_at, size, model)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, model: str, method: str) -> float:
+        for pattern in (f'{model}.{method}', model):
+            if pattern in self.ttls:
+                return self.ttls[pattern]
+        return self.default_ttl
+
+    def _remove(self, key: str):
+        """Drop an entry; caller holds the lock"""
+        _, _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[0]
+            else:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return False, None
+        return True, copy.deepcopy(value)
+
+    def put(self, key: str, model: str, value: Any, ttl: float):
+        # Serialised length is a cheap stand-in for the in-memory footprint
+        size = len(key) + len(_json(value))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size, model)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_model(self, model: str) -> int:
+        """Forget every cached read of a model; returns the number of entries dropped"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[3] == model]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+class DayCache:
+    """
+    Results for calendar days that can no longer change
+    Keys are tuples ending in the day (a date), e.g. ('last_mile', 'ICAD', day).
+    Entries have no TTL: they stay until invalidated, or until evicted
+    least-recently-used once max_entries is reached. Callers must not mutate
+    the values they get back.
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """Forget the days in [start, end] (open-ended when a bound is None); returns entries dropped"""
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (start is None or key[-1] >= start) and (end is None or key[-1] <= end)
+            ]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,72 @@
+"""
+Change detection for Odoo models
+
+A dashboard section is derived from a handful of models. Instead of
+recomputing it on a fixed timer, the background refresher asks whether any
+of them has a newer write_date than the last time the section looked, and
+skips recomputes (stretching its polling interval) while nothing changed.
+
+ChangeProbe asks Odoo for the newest write_date of one model (a search_read
+with limit 1). Several sections are computed from the same model, so there
+is one probe per model, shared by all of them: an answer younger than
+max_age is reused instead of asking Odoo again. ChangeWatch holds what one
+section has seen of its models' probes.
+
+write_date doesn't move when a record is deleted, so callers should still
+recompute at some maximum interval.
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ChangeProbe:
+    """Newest write_date of one model of one Odoo client, shared by the sections using it"""
+    def __init__(self, client, model: str, max_age: float = 30.0):
+        self.client = client
+        self.model = model
+        self.max_age = max_age
+        self._latest: Any = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.reuses = 0
+        self.changes = 0
+
+    def latest(self) -> Any:
+        """Newest write_date, from Odoo unless another section asked within max_age"""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.max_age:
+                self.reuses += 1
+                return self._latest
+        # Concurrent callers share one round trip through the client's single-flight
+        write_date = self.client.latest_write_date(self.model)
+        with self._lock:
+            self.queries += 1
+            if self._checked_at is not None and write_date != self._latest:
+                self.changes += 1
+                logger.debug(f"Changes detected in {self.model}")
+            self._latest, self._checked_at = write_date, time.monotonic()
+        return write_date
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'queries': self.queries, 'reuses': self.reuses, 'changes': self.changes}
+
+class ChangeWatch:
+    """
+    Whether any of a section's models changed since the section last looked
+    changed() is True on the first call, since nothing has been seen yet.
+    """
+    def __init__(self, probes: Iterable[ChangeProbe]):
+        self.probes = tuple(probes)
+        self._seen: Dict[str, Any] = {}
+
+    def changed(self) -> bool:
+        """Probe every model; True if any has a newer write_date than this section saw last time"""
+        latest = {probe.model: probe.latest() for probe in self.probes}
+        moved = [model for model, write_date in latest.items() if self._seen.get(model) != write_date]
+        self._seen.update(latest)
+        return bool(moved)
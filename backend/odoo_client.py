@@ -0,0 +1,308 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+from typing import List, Dict, Any, Callable, Optional
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+from odoo_transport import create_transport
+from odoo_resilience import backoff_delay, call_key, Bulkhead, CircuitBreaker, SingleFlight
+from odoo_cache import DayCache, QueryCache, canonical_call, parse_ttls
+
+# Load environment variables from parent directory
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+logger = logging.getLogger(__name__)
+
+def many2one_id(value: Any) -> Any:
+    """Id of a many-to-one value as Odoo returns it ([id, name], id or False)"""
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value or None
+
+class OdooClient:
+    """
+    Connection handling shared by OdooAPI and OdooAPI2
+    Subclasses set env_prefix and label to select their Odoo instance
+    """
+    env_prefix = 'ODOO'
+    label = 'Odoo'
+
+    # Idempotent read methods that are safe to retry after a transport failure
+    READ_METHODS = frozenset({'search_read', 'search_count', 'read', 'read_group', 'search'})
+
+    # Default read cache TTLs in seconds, by 'model' or 'model.method';
+    # extended or overridden with {prefix}_CACHE_TTLS
+    CACHE_TTLS: Dict[str, float] = {}
+
+    def __init__(self):
+        self.url = os.getenv(f'{self.env_prefix}_URL')
+        self.db = os.getenv(f'{self.env_prefix}_DB')
+        self.username = os.getenv(f'{self.env_prefix}_USERNAME')
+        self.api_key = os.getenv(f'{self.env_prefix}_API_KEY')
+
+        if not all([self.url, self.db, self.username, self.api_key]):
+            raise ValueError(f"Missing required environment variables for {self.label} connection")
+
+        # Per-call socket timeout and retry policy for read methods. Worst case for
+        # a read is (retries + 1) * timeout plus at most retries * max_backoff.
+        self.timeout = float(self._setting('TIMEOUT', '30'))
+        self.max_retries = int(self._setting('RETRIES', '2'))
+        self.retry_backoff = float(self._setting('RETRY_BACKOFF', '0.5'))
+        self.retry_max_backoff = float(self._setting('RETRY_MAX_BACKOFF', '4'))
+
+        # Wire transport (XML-RPC or JSON-RPC); both keep a bounded pool of
+        # keep-alive connections so concurrent calls never share one
+        pool_size = int(self._setting('POOL_SIZE', '8'))
+        self.transport = create_transport(
+            self._setting('TRANSPORT', 'xmlrpc'),
+            self.url,
+            pool_size=pool_size,
+            idle_timeout=float(self._setting('POOL_IDLE_TIMEOUT', '60')),
+            health_check_interval=float(self._setting('POOL_HEALTH_CHECK_INTERVAL', '30')),
+            acquire_timeout=float(self._setting('POOL_ACQUIRE_TIMEOUT', '30')),
+            timeout=self.timeout or None,
+            label=self.label
+        )
+        self.uid = None
+
+        self._stats_lock = threading.Lock()
+        self.counters = {'retries': 0, 'reauthentications': 0}
+
+        # Stop calling a degraded backend; a background probe decides when to resume
+        self.breaker = CircuitBreaker(
+            self.label,
+            failure_threshold=int(self._setting('BREAKER_FAILURES', '5')),
+            reset_timeout=float(self._setting('BREAKER_RESET_TIMEOUT', '30')),
+            probe=self._probe
+        )
+
+        # Identical concurrent reads share one round trip
+        self.singleflight = SingleFlight()
+
+        # Repeated reads within their model's TTL don't reach Odoo at all
+        self.query_cache = QueryCache(
+            ttls={**self.CACHE_TTLS, **parse_ttls(self._setting('CACHE_TTLS', ''))},
+            default_ttl=float(self._setting('CACHE_DEFAULT_TTL', '0')),
+            max_entries=int(self._setting('CACHE_MAX_ENTRIES', '2048')),
+            max_bytes=int(self._setting('CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+        )
+
+        # Own worker threads and queue limit, so one slow backend can't starve the other
+        self.bulkhead = Bulkhead(
+            self.label,
+            max_concurrent=int(self._setting('MAX_CONCURRENCY', str(pool_size))),
+            max_queue=int(self._setting('MAX_QUEUE', '32'))
+        )
+
+        # UAE timezone (UTC+4), and its name for Odoo's context
+        self.uae_tz = timezone(timedelta(hours=4))
+        self.uae_tz_name = 'Asia/Dubai'
+
+        # Figures for days that have closed in UAE time are kept until invalidated.
+        # The grace period leaves room for records entered shortly after midnight.
+        self.day_cache = DayCache(max_entries=int(self._setting('DAY_CACHE_MAX_ENTRIES', '4096')))
+        self.day_cache_grace = timedelta(minutes=float(self._setting('DAY_CACHE_GRACE_MINUTES', '60')))
+
+    def _setting(self, name: str, default: str) -> str:
+        """Read a tuning setting, e.g. ODOO2_POOL_SIZE, falling back to the default"""
+        return os.getenv(f'{self.env_prefix}_{name}', default)
+
+    def authenticate(self):
+        """Authenticate with Odoo and get user ID"""
+        try:
+            self.uid = self.transport.authenticate(self.db, self.username, self.api_key)
+            if not self.uid:
+                raise Exception("Authentication failed")
+            logger.info(f"Successfully authenticated with {self.label}, UID: {self.uid}")
+            return True
+        except Exception as e:
+            logger.error(f"Authentication error: {e}")
+            return False
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _probe(self):
+        """Circuit breaker probe: one cheap authenticated query that bypasses the breaker"""
+        if not self.uid:
+            self.uid = self.transport.authenticate(self.db, self.username, self.api_key)
+            if not self.uid:
+                raise Exception("Authentication failed")
+        self.transport.execute_kw(self.db, self.uid, self.api_key,
+                                  'res.users', 'search_count', [[['id', '=', self.uid]]], {})
+
+    def execute_kw(self, model: str, method: str, args: List = None, kwargs: Dict = None, cache: bool = True):
+        """
+        Execute Odoo API call
+        Read calls are served from the query cache while their TTL lasts, and
+        concurrent identical reads are coalesced into a single request. Writes
+        always go to Odoo and invalidate the cached reads of their model.
+        cache=False reads from Odoo whatever the TTL, for answers that must be current.
+        """
+        if method not in self.READ_METHODS:
+            try:
+                return self._execute_kw(model, method, args, kwargs)
+            finally:
+                self.query_cache.invalidate_model(model)
+
+        key = call_key(self.label, model, method, *canonical_call(method, args, kwargs))
+        ttl = self.query_cache.ttl_for(model, method) if cache else 0
+        if ttl > 0:
+            found, result = self.query_cache.get(key)
+            if found:
+                return result
+
+        result = self.singleflight.do(key, lambda: self._execute_kw(model, method, args, kwargs))
+        if ttl > 0:
+            self.query_cache.put(key, model, result, ttl)
+        return result
+
+    def _execute_kw(self, model: str, method: str, args: List = None, kwargs: Dict = None):
+        """
+        Execute Odoo API call with error handling
+        - fails fast with CircuitOpenError while the backend's breaker is open
+        - read methods are retried on transport failures with jittered exponential backoff
+        - a rejected uid/API key triggers one re-authentication and a replay of the call
+        """
+        self.breaker.before_call()
+
+        if not self.uid:
+            if not self.authenticate():
+                self.breaker.record_failure()
+                raise Exception(f"Failed to authenticate with {self.label}")
+
+        retries = self.max_retries if method in self.READ_METHODS else 0
+        attempt = 0
+        reauthenticated = False
+
+        while True:
+            try:
+                result = self.transport.execute_kw(
+                    self.db, self.uid, self.api_key,
+                    model, method,
+                    args or [],
+                    kwargs or {}
+                )
+                self.breaker.record_success()
+                return result
+            except Exception as e:
+                if not reauthenticated and self.transport.is_access_denied(e):
+                    # Odoo rejected the request before running it, so replaying is safe
+                    reauthenticated = True
+                    logger.warning(f"{self.label} denied access for {method} on {model}, re-authenticating")
+                    self._count('reauthentications')
+                    if self.authenticate():
+                        continue
+                elif attempt < retries and self.transport.is_transient(e):
+                    delay = backoff_delay(attempt, self.retry_backoff, self.retry_max_backoff)
+                    attempt += 1
+                    logger.warning(f"Retrying {method} on {model} ({attempt}/{retries}) in {delay:.2f}s: {e}")
+                    self._count('retries')
+                    time.sleep(delay)
+                    continue
+
+                if self.transport.is_transient(e):
+                    self.breaker.record_failure()
+                logger.error(f"Error executing {method} on {model}: {e}")
+                raise
+
+    def test_connection(self):
+        """Test connection to Odoo"""
+        try:
+            if not self.uid:
+                return self.authenticate()
+
+            # Try a simple query to test the connection
+            result = self.execute_kw('res.users', 'search_read',
+                                   [[['id', '=', self.uid]]],
+                                   {'fields': ['name'], 'limit': 1})
+            return bool(result)
+        except Exception as e:
+            logger.error(f"Connection test failed: {e}")
+            return False
+
+    def read_group(self, model: str, domain: List, fields: List[str], groupby: List[str],
+                   day_buckets: bool = False) -> List[Dict[str, Any]]:
+        """
+        Aggregate on the Odoo side: one row per combination of the groupby values
+        fields take Odoo's 'field:agg' form (e.g. 'x_studio_net_weight_ton:sum');
+        every row carries its record count in '__count'. Many-to-one group values
+        come back as [id, display_name] (see many2one_id). With day_buckets,
+        'datetime_field:day' groups are cut at UAE midnight (see group_day).
+        """
+        kwargs = {'lazy': False}
+        if day_buckets:
+            kwargs['context'] = {'tz': self.uae_tz_name}
+        return self.execute_kw(model, 'read_group', [domain, fields, groupby], kwargs)
+
+    def group_day(self, group: Dict[str, Any], groupby: str) -> Optional[date]:
+        """UAE day of a read_group row grouped by 'datetime_field:day', from the bucket's UTC range"""
+        ranges = group.get('__range') or {}
+        bounds = ranges.get(groupby) or ranges.get(groupby.split(':')[0])
+        if not bounds or not bounds.get('from'):
+            return None
+        start = datetime.strptime(bounds['from'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        return start.astimezone(self.uae_tz).date()
+
+    def latest_write_date(self, model: str) -> Any:
+        """
+        Newest write_date of a model (False if it has no records)
+        Bypasses the query cache: the answer is only useful if it's current.
+        """
+        records = self.singleflight.do(
+            call_key(self.label, model, 'latest_write_date'),
+            lambda: self._execute_kw(model, 'search_read', [[]],
+                                     {'fields': ['write_date'], 'order': 'write_date desc', 'limit': 1})
+        )
+        return records[0]['write_date'] if records else False
+
+    def is_closed_day(self, day: date) -> bool:
+        """True once a UAE calendar day (plus the grace period) is over"""
+        end_of_day = datetime.combine(day + timedelta(days=1), datetime.min.time()).replace(tzinfo=self.uae_tz)
+        return datetime.now(self.uae_tz) >= end_of_day + self.day_cache_grace
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime counters for monitoring"""
+        with self._stats_lock:
+            counters = dict(self.counters)
+        return {
+            'transport': self.transport.name,
+            **counters,
+            'circuit': self.breaker.stats(),
+            'singleflight': self.singleflight.stats(),
+            'query_cache': self.query_cache.stats(),
+            'day_cache': self.day_cache.stats(),
+            'bulkhead': self.bulkhead.stats(),
+            **self.transport.stats()
+        }
+
+    # ------------------------------------------------------------------
+    # Async access path for the FastAPI endpoints
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """Release worker threads and connections"""
+        self.bulkhead.shutdown()
+        self.transport.close()
+
+    async def run_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking Odoo call on this backend's worker threads so the event loop
+        stays responsive; raises BulkheadFullError if too many calls are queued
+        """
+        return await self.bulkhead.run(func, *args, **kwargs)
+
+    async def authenticate_async(self):
+        """Async version of authenticate()"""
+        return await self.run_async(self.authenticate)
+
+    async def execute_kw_async(self, model: str, method: str, args: List = None, kwargs: Dict = None):
+        """Async version of execute_kw()"""
+        return await self.run_async(self.execute_kw, model, method, args, kwargs)
+
+    async def test_connection_async(self):
+        """Async version of test_connection()"""
+        return await self.run_async(self.test_connection)
@@ -0,0 +1,143 @@
+"""
+Incrementally maintained window of train departures
+
+Train departures are requested for windows of 14, 30 or more days. Instead
+of re-reading the whole window on every call, DepartureWindow keeps the
+departed and arrived trains it has seen and extends what it holds:
+
+- a longer window than any before reads only the older, missing range
+- every call reads the trains written since the last fetch, skipping those
+  already 'Arrived at Destination', which don't change any more, and drops
+  the ones that no longer departed within the window
+
+Deleted trains are only noticed by a full reload every full_reload_interval.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_FIELD = 'x_studio_selection_field_mojWp'
+DEPARTED = 'Departed from Origin'
+ARRIVED = 'Arrived at Destination'
+
+TRAIN_FIELDS = [
+    'display_name', 'x_name', 'x_studio_from', 'x_studio_to_1', 'x_studio_actual_departure',
+    STATUS_FIELD, 'x_studio_train_set', 'write_date'
+]
+
+class DepartureWindow:
+    """
+    Departed/arrived trains with an actual departure at or after covered_from
+    Each fetch is a single search_read; a call makes one in the steady state
+    and two when it also extends the window further back.
+    """
+    def __init__(self, client, full_reload_interval: float = 6 * 3600.0):
+        self.client = client
+        self.full_reload_interval = full_reload_interval
+
+        self.trains: Dict[int, Dict[str, Any]] = {}
+        self.covered_from: Optional[str] = None
+        self._last_write: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        # Bumped by every full load, so merges planned against older state are redone
+        self._epoch = 0
+
+        # Only guards the state; Odoo is never called while holding it
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.records_read = 0
+
+    def _fetch(self, domain: List) -> List[Dict[str, Any]]:
+        records = self.client.execute_kw('x_scheduled_train', 'search_read', [domain], {'fields': TRAIN_FIELDS})
+        with self._lock:
+            self.fetches += 1
+            self.records_read += len(records)
+        return records
+
+    def _in_window(self, record: Dict[str, Any]) -> bool:
+        departure = record.get('x_studio_actual_departure')
+        return record.get(STATUS_FIELD) in (DEPARTED, ARRIVED) and bool(departure) and departure >= self.covered_from
+
+    def _apply(self, records: List[Dict[str, Any]]):
+        """Merge fetched trains; caller holds the lock"""
+        for record in records:
+            held = self.trains.get(record['id'])
+            if held is not None and (held.get('write_date') or '') > (record.get('write_date') or ''):
+                # A concurrent call already merged a newer version
+                continue
+            if self._in_window(record):
+                self.trains[record['id']] = record
+            else:
+                # Left the departed/arrived states, lost its departure or moved before the window
+                self.trains.pop(record['id'], None)
+            write_date = record.get('write_date')
+            if write_date and (self._last_write is None or write_date > self._last_write):
+                self._last_write = write_date
+
+    def departures_since(self, cutoff: str) -> List[Dict[str, Any]]:
+        """Trains that departed at or after cutoff, newest first"""
+        # The status filter is AND-ed with the terms that follow it
+        in_service = ['|', [STATUS_FIELD, '=', DEPARTED], [STATUS_FIELD, '=', ARRIVED]]
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                full = self.covered_from is None or now - self.loaded_at >= self.full_reload_interval
+                epoch, covered_from, since = self._epoch, self.covered_from, self._last_write
+                arrived = sorted(train_id for train_id, train in self.trains.items() if train.get(STATUS_FIELD) == ARRIVED)
+
+            if full:
+                records = self._fetch(in_service + [['x_studio_actual_departure', '>=', cutoff]])
+                with self._lock:
+                    self.trains, self._last_write = {}, None
+                    self.covered_from, self.loaded_at = cutoff, now
+                    self._epoch += 1
+                    self._apply(records)
+                    return self._departed_since(cutoff)
+
+            older = []
+            if cutoff < covered_from:
+                older = self._fetch(in_service + [
+                    ['x_studio_actual_departure', '>=', cutoff],
+                    ['x_studio_actual_departure', '<', covered_from]
+                ])
+            # Read after the older range, so it covers everything written before that was read.
+            # No status or departure filter once trains are held: changed trains that no
+            # longer belong in the window have to be seen to be dropped.
+            if since:
+                # >= rather than > so trains written in the same second aren't missed
+                changed = [['write_date', '>=', since]]
+            else:
+                changed = [['x_studio_actual_departure', '>=', min(cutoff, covered_from)]]
+            arrived = sorted(set(arrived) | {train['id'] for train in older if train.get(STATUS_FIELD) == ARRIVED})
+            if arrived:
+                changed.append(['id', 'not in', arrived])
+            records = self._fetch(changed)
+
+            with self._lock:
+                if self._epoch != epoch:
+                    # Reloaded meanwhile; the window this was planned against is gone
+                    continue
+                if cutoff < covered_from:
+                    # Another call may have extended the window further meanwhile
+                    self.covered_from = min(self.covered_from, cutoff)
+                    self._apply(older)
+                self._apply(records)
+                return self._departed_since(cutoff)
+
+    def _departed_since(self, cutoff: str) -> List[Dict[str, Any]]:
+        """Held trains departed at or after cutoff, newest first; caller holds the lock"""
+        trains = [train for train in self.trains.values() if train['x_studio_actual_departure'] >= cutoff]
+        trains.sort(key=lambda train: train['x_studio_actual_departure'], reverse=True)
+        return trains
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'trains': len(self.trains),
+                'covered_from': self.covered_from,
+                'fetches': self.fetches,
+                'records_read': self.records_read,
+            }
@@ -0,0 +1,187 @@
+"""
+Thread-safe pool of keep-alive XML-RPC connections to an Odoo instance
+"""
+import time
+import threading
+import xmlrpc.client
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+    pass
+
+class _TimeoutMixin:
+    """Apply a socket timeout to the HTTP connection a Transport opens"""
+    timeout: Optional[float] = None
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = self.timeout
+        return conn
+
+class TimeoutTransport(_TimeoutMixin, xmlrpc.client.Transport):
+    pass
+
+class SafeTimeoutTransport(_TimeoutMixin, xmlrpc.client.SafeTransport):
+    pass
+
+class XmlRpcConnection:
+    """
+    One warm HTTP connection to Odoo
+    The common and object proxies share a single Transport, which keeps the
+    underlying HTTP/1.1 connection open between calls.
+    """
+    def __init__(self, url: str, timeout: Optional[float] = None):
+        transport_cls = SafeTimeoutTransport if url.startswith('https') else TimeoutTransport
+        self.transport = transport_cls()
+        self.transport.timeout = timeout
+        self.common = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/common', transport=self.transport)
+        self.models = xmlrpc.client.ServerProxy(f'{url}/xmlrpc/2/object', transport=self.transport)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def check(self) -> bool:
+        """Cheap unauthenticated round trip to verify the connection still works"""
+        try:
+            self.common.version()
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled Odoo connection failed health check: {e}")
+            return False
+
+    def close(self):
+        try:
+            self.transport.close()
+        except Exception:
+            pass
+
+class ConnectionPool:
+    """
+    Bounded pool of connections
+    - at most max_size connections exist at once; extra callers wait up to acquire_timeout
+    - idle connections are reused most-recently-used first so they stay warm
+    - connections idle longer than idle_timeout are closed
+    - connections idle longer than health_check_interval are checked before reuse
+    """
+    def __init__(self, factory: Callable[[], XmlRpcConnection], max_size: int = 8,
+                 idle_timeout: float = 60.0, health_check_interval: float = 30.0,
+                 acquire_timeout: float = 30.0, name: str = 'odoo'):
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+
+        self._idle: List[XmlRpcConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._in_use = 0
+
+        # Counters for monitoring
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.failed_checks = 0
+
+    def _evict_idle(self, now: float) -> List[XmlRpcConnection]:
+        """Remove expired idle connections; caller holds the lock"""
+        expired = [c for c in self._idle if now - c.last_used > self.idle_timeout]
+        if expired:
+            self._idle = [c for c in self._idle if now - c.last_used <= self.idle_timeout]
+            self.evicted += len(expired)
+        return expired
+
+    def _acquire(self) -> XmlRpcConnection:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PoolTimeoutError(f"No {self.name} connection available within {self.acquire_timeout}s")
+
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    for expired in self._evict_idle(now):
+                        expired.close()
+                    conn = self._idle.pop() if self._idle else None
+                    self._in_use += 1
+
+                if conn is None:
+                    try:
+                        conn = self.factory()
+                    except BaseException:
+                        with self._lock:
+                            self._in_use -= 1
+                        raise
+                    with self._lock:
+                        self.created += 1
+                    return conn
+
+                if now - conn.last_used > self.health_check_interval and not conn.check():
+                    conn.close()
+                    with self._lock:
+                        self._in_use -= 1
+                        self.failed_checks += 1
+                    continue
+
+                with self._lock:
+                    self.reused += 1
+                return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: XmlRpcConnection, reusable: bool):
+        now = time.monotonic()
+        conn.last_used = now
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append(conn)
+            expired = self._evict_idle(now)
+        if not reusable:
+            conn.close()
+        for c in expired:
+            c.close()
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the with-block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except xmlrpc.client.Fault:
+            # Server-side error: the HTTP exchange completed, connection is still good
+            self._release(conn, reusable=True)
+            raise
+        except BaseException:
+            # Transport-level failure leaves the connection in an unknown state
+            self._release(conn, reusable=False)
+            raise
+        else:
+            self._release(conn, reusable=True)
+
+    def close(self):
+        """Close all idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'reused': self.reused,
+                'evicted': self.evicted,
+                'failed_health_checks': self.failed_checks,
+            }
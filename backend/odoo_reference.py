@@ -0,0 +1,182 @@
+"""
+In-memory reference data for the main Odoo instance
+
+Materials and forwarding order (FWO) names change rarely but are looked up for
+every stockpile on every refresh. ReferenceData bulk-loads them with one query
+per model, then refreshes incrementally by write_date and answers lookups from
+memory. Names that don't exist in Odoo are remembered for a while as well, so
+a stockpile pointing at a missing FWO doesn't cost a query per refresh.
+"""
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ReferenceData:
+    """
+    Material id -> name and FWO name -> id
+    - load(): full bulk load (all materials, FWOs created in the last fwo_days)
+    - refresh(): only records with write_date at or after the newest one seen
+    Lookups refresh lazily once refresh_interval has passed and reload fully
+    after full_reload_interval, which also drops records deleted in Odoo.
+    """
+    def __init__(self, client, refresh_interval: float = 300.0, full_reload_interval: float = 86400.0,
+                 fwo_days: int = 90, negative_ttl: float = 300.0):
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.fwo_days = fwo_days
+        self.negative_ttl = negative_ttl
+
+        self.materials: Dict[int, str] = {}
+        self.fwo_ids: Dict[str, int] = {}
+        self._missing_fwos: Dict[str, float] = {}
+        self._last_write: Dict[str, Optional[str]] = {'x_material': None, 'x_fwo': None}
+        self.loaded_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _fetch(self, model: str, domain: List, fields: List[str]) -> List[Dict[str, Any]]:
+        # Not from the query cache: a refresh whose watermark hasn't moved would get its own old answer
+        return self.client.execute_kw(model, 'search_read', [domain], {'fields': fields + ['write_date']},
+                                      cache=False)
+
+    def _apply(self, model: str, records: List[Dict[str, Any]]):
+        """Merge fetched records; caller holds the lock"""
+        for record in records:
+            if model == 'x_material':
+                self.materials[record['id']] = record.get('x_name') or record.get('display_name') or 'Unknown'
+            elif record.get('x_name'):
+                self.fwo_ids[record['x_name']] = record['id']
+                self._missing_fwos.pop(record['x_name'], None)
+            write_date = record.get('write_date')
+            if write_date and (self._last_write[model] is None or write_date > self._last_write[model]):
+                self._last_write[model] = write_date
+
+    def load(self):
+        """Bulk-load materials and recent FWOs, one query each"""
+        fwo_since = (datetime.now(timezone.utc) - timedelta(days=self.fwo_days)).strftime('%Y-%m-%d %H:%M:%S')
+        materials = self._fetch('x_material', [], ['x_name', 'display_name'])
+        fwos = self._fetch('x_fwo', [['create_date', '>=', fwo_since]], ['x_name'])
+
+        with self._lock:
+            self.materials = {}
+            self.fwo_ids = {}
+            self._missing_fwos = {}
+            self._last_write = {'x_material': None, 'x_fwo': None}
+            self._apply('x_material', materials)
+            self._apply('x_fwo', fwos)
+            self.loaded_at = self.refreshed_at = time.monotonic()
+        logger.info(f"Loaded reference data: {len(materials)} materials, {len(fwos)} forwarding orders")
+
+    def refresh(self):
+        """Fetch only records changed since the newest write_date seen"""
+        changed = {}
+        for model, fields in (('x_material', ['x_name', 'display_name']), ('x_fwo', ['x_name'])):
+            since = self._last_write[model]
+            # >= rather than > so records written in the same second aren't missed
+            domain = [['write_date', '>=', since]] if since else []
+            changed[model] = self._fetch(model, domain, fields)
+
+        with self._lock:
+            for model, records in changed.items():
+                self._apply(model, records)
+            self.refreshed_at = time.monotonic()
+        logger.debug(f"Refreshed reference data: {sum(len(r) for r in changed.values())} changed records")
+
+    def _ensure_fresh(self):
+        """Load or refresh when due; a failed refresh keeps serving the data already held"""
+        now = time.monotonic()
+        if self.loaded_at is not None and now - self.refreshed_at < self.refresh_interval:
+            return
+        # Only one thread refreshes; the others carry on with the current data
+        if not self._refresh_lock.acquire(blocking=self.loaded_at is None):
+            return
+        try:
+            if self.loaded_at is None or now - self.loaded_at >= self.full_reload_interval:
+                self.load()
+            elif now - self.refreshed_at >= self.refresh_interval:
+                self.refresh()
+        except Exception as e:
+            logger.warning(f"Reference data refresh failed, serving cached data: {e}")
+            if self.loaded_at is None:
+                raise
+        finally:
+            self._refresh_lock.release()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def material_name(self, material_id: int) -> str:
+        """Name of a material, 'Unknown' if it doesn't exist"""
+        self._ensure_fresh()
+        with self._lock:
+            name = self.materials.get(material_id)
+            if name is not None:
+                self.hits += 1
+                return name
+            self.misses += 1
+
+        # Created since the last refresh
+        records = self.client.execute_kw('x_material', 'read', [[material_id]],
+                                         {'fields': ['x_name', 'display_name', 'write_date']})
+        with self._lock:
+            self._apply('x_material', records)
+            return self.materials.get(material_id, 'Unknown')
+
+    def fwo_id_map(self, names: List[str]) -> Dict[str, Optional[int]]:
+        """Ids of several forwarding orders by name, with at most one query for the unknown ones"""
+        self._ensure_fresh()
+        now = time.monotonic()
+        result: Dict[str, Optional[int]] = {}
+        unknown = []
+        with self._lock:
+            for name in dict.fromkeys(names):
+                fwo_id = self.fwo_ids.get(name)
+                if fwo_id is not None:
+                    self.hits += 1
+                    result[name] = fwo_id
+                elif self._missing_fwos.get(name, 0) > now:
+                    self.negative_hits += 1
+                    result[name] = None
+                else:
+                    self.misses += 1
+                    unknown.append(name)
+        if not unknown:
+            return result
+
+        records = self.client.execute_kw('x_fwo', 'search_read', [[['x_name', 'in', unknown]]],
+                                         {'fields': ['x_name', 'write_date']})
+        with self._lock:
+            self._apply('x_fwo', records)
+            for name in unknown:
+                result[name] = self.fwo_ids.get(name)
+                if result[name] is None:
+                    self._missing_fwos[name] = now + self.negative_ttl
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'materials': len(self.materials),
+                'forwarding_orders': len(self.fwo_ids),
+                'missing_forwarding_orders': sum(1 for expires in self._missing_fwos.values() if expires > now),
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'refreshed_seconds_ago': round(now - self.refreshed_at, 1) if self.refreshed_at else None,
+            }
@@ -0,0 +1,253 @@
+"""
+Failure-handling helpers for Odoo calls
+"""
+import asyncio
+import copy
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 4.0) -> float:
+    """
+    Full-jitter exponential backoff
+    Returns a random delay in [0, min(cap, base * 2**attempt)] so retries from
+    many workers don't hit a recovering Odoo in lockstep.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Odoo while the backend's circuit breaker is open"""
+    pass
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker (closed -> open -> half-open -> closed)
+    - closed: calls go through; consecutive outage failures are counted
+    - open: calls fail fast with CircuitOpenError so a degraded Odoo is left alone
+    - half-open: a single background probe runs; success closes the breaker,
+      failure re-opens it for another reset_timeout
+    Requests never act as the trial call, only the probe does.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 probe: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+
+    def before_call(self):
+        """Raise CircuitOpenError unless calls are currently allowed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - (self.opened_at or 0)))
+        raise CircuitOpenError(f"{self.name} circuit is {self.state}; next probe in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state != self.CLOSED or self.failures < self.failure_threshold:
+                return
+            self._open()
+        logger.error(f"{self.name} circuit opened after {self.failure_threshold} consecutive failures")
+
+    def _open(self):
+        """Switch to open and make sure one probe thread is scheduled; caller holds the lock"""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f'{self.name}-breaker-probe', daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.reset_timeout)
+            with self._lock:
+                self.state = self.HALF_OPEN
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"{self.name} circuit probe failed, staying open: {e}")
+                with self._lock:
+                    self.state = self.OPEN
+                    self.opened_at = time.monotonic()
+                continue
+
+            with self._lock:
+                self.state = self.CLOSED
+                self.failures = 0
+                self.opened_at = None
+            logger.info(f"{self.name} circuit closed, probe succeeded")
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected,
+            }
+
+def call_key(backend: str, model: str, method: str, args: Any = None, kwargs: Any = None) -> str:
+    """Canonical key for an execute_kw call (kwargs order does not matter)"""
+    return json.dumps([backend, model, method, args or [], kwargs or {}],
+                      sort_keys=True, separators=(',', ':'), default=str)
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls
+    The first caller for a key executes the call; callers arriving while it is
+    in flight wait and receive the same outcome. Waiters get a deep copy of the
+    result because callers post-process Odoo records in place.
+    """
+    def __init__(self):
+        self._calls: Dict[str, _InFlightCall] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = func()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # Freeze a copy before the leader's caller starts mutating the original
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+class BulkheadFullError(Exception):
+    """Raised when a backend already has max_queue calls waiting for a worker"""
+    pass
+
+class Bulkhead:
+    """
+    Isolated worker capacity for one Odoo backend
+    Blocking calls run on the backend's own thread pool (max_concurrent workers),
+    so a slow backend can only exhaust its own threads. At most max_queue calls
+    may wait for a worker; beyond that callers are rejected immediately.
+    """
+    def __init__(self, name: str, max_concurrent: int = 8, max_queue: int = 32):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix=f'{name}-worker')
+
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on this bulkhead's workers"""
+        with self._lock:
+            # Calls beyond the free workers wait in the queue; refuse once it is full
+            if self.active + self.queued >= self.max_concurrent + self.max_queue:
+                self.rejected += 1
+                raise BulkheadFullError(f"{self.name} is overloaded ({self.queued} calls queued)")
+            self.queued += 1
+        submitted_at = time.monotonic()
+
+        def task():
+            wait = time.monotonic() - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        future = self.executor.submit(task)
+
+        def on_done(f):
+            # Cancelled before a worker picked it up: task() never ran
+            if f.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'active': self.active,
+                'queue_depth': self.queued,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self.total_wait / started * 1000, 1) if started else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 1),
+            }
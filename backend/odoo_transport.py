@@ -0,0 +1,187 @@
+"""
+Wire transports for talking to Odoo's external API
+
+XmlRpcTransport is the classic /xmlrpc/2 endpoint over pooled keep-alive
+connections. JsonRpcTransport uses the /jsonrpc endpoint over an httpx client
+with persistent HTTP/1.1 connections and gzip responses; JSON decoding is done
+in C and is much cheaper than xmlrpc.client's pure-Python unmarshalling for
+large search_read results.
+
+Select the transport with ODOO_TRANSPORT / ODOO2_TRANSPORT = xmlrpc | jsonrpc.
+"""
+import http.client
+import itertools
+import threading
+import xmlrpc.client
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from odoo_pool import ConnectionPool, XmlRpcConnection, PoolTimeoutError
+
+# HTTP statuses worth retrying: the request never reached a healthy worker
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+class OdooServerError(Exception):
+    """Error returned by the Odoo server over JSON-RPC (the XML-RPC Fault equivalent)"""
+    def __init__(self, message: str, code: Optional[int] = None, data: Optional[Dict] = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data or {}
+
+class OdooTransport:
+    """Interface implemented by every transport"""
+    name = 'base'
+
+    def version(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def authenticate(self, db: str, username: str, api_key: str):
+        raise NotImplementedError
+
+    def execute_kw(self, db: str, uid: int, api_key: str, model: str, method: str,
+                   args: List, kwargs: Dict) -> Any:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def is_transient(self, exc: Exception) -> bool:
+        """True for network-level failures where retrying the same call can succeed"""
+        return False
+
+    def is_access_denied(self, exc: Exception) -> bool:
+        """True when Odoo rejected the uid/API key (expired session, rotated key)"""
+        return False
+
+class XmlRpcTransport(OdooTransport):
+    name = 'xmlrpc'
+
+    def __init__(self, url: str, pool_size: int = 8, idle_timeout: float = 60.0,
+                 health_check_interval: float = 30.0, acquire_timeout: float = 30.0,
+                 timeout: Optional[float] = None, label: str = 'odoo'):
+        self.pool = ConnectionPool(
+            lambda: XmlRpcConnection(url, timeout=timeout),
+            max_size=pool_size,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+            acquire_timeout=acquire_timeout,
+            name=label
+        )
+
+    def version(self):
+        with self.pool.connection() as conn:
+            return conn.common.version()
+
+    def authenticate(self, db, username, api_key):
+        with self.pool.connection() as conn:
+            return conn.common.authenticate(db, username, api_key, {})
+
+    def execute_kw(self, db, uid, api_key, model, method, args, kwargs):
+        with self.pool.connection() as conn:
+            return conn.models.execute_kw(db, uid, api_key, model, method, args, kwargs)
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self):
+        return {'pool': self.pool.stats()}
+
+    def is_transient(self, exc):
+        if isinstance(exc, PoolTimeoutError):
+            return False
+        if isinstance(exc, xmlrpc.client.ProtocolError):
+            return exc.errcode in RETRYABLE_STATUS
+        return isinstance(exc, (OSError, http.client.HTTPException))
+
+    def is_access_denied(self, exc):
+        # Odoo maps odoo.exceptions.AccessDenied to fault code 3
+        return isinstance(exc, xmlrpc.client.Fault) and (
+            exc.faultCode == 3 or 'AccessDenied' in str(exc.faultString)
+        )
+
+class JsonRpcTransport(OdooTransport):
+    name = 'jsonrpc'
+
+    def __init__(self, url: str, pool_size: int = 8, idle_timeout: float = 60.0,
+                 timeout: Optional[float] = None, **_):
+        # httpx.Client is thread-safe and keeps its own bounded keep-alive pool
+        self.client = httpx.Client(
+            base_url=url,
+            http2=False,
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)) if timeout else None,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=idle_timeout
+            ),
+            headers={'Accept-Encoding': 'gzip', 'Content-Type': 'application/json'}
+        )
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+
+    def _call(self, service: str, method: str, *args) -> Any:
+        payload = {
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': service, 'method': method, 'args': list(args)},
+            'id': next(self._ids),
+        }
+        response = self.client.post('/jsonrpc', json=payload)
+        response.raise_for_status()
+        body = response.json()
+
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += response.num_bytes_downloaded
+
+        if body.get('error'):
+            error = body['error']
+            data = error.get('data') or {}
+            raise OdooServerError(data.get('message') or error.get('message', 'Odoo JSON-RPC error'),
+                                  code=error.get('code'), data=data)
+        return body.get('result')
+
+    def version(self):
+        return self._call('common', 'version')
+
+    def authenticate(self, db, username, api_key):
+        return self._call('common', 'authenticate', db, username, api_key, {})
+
+    def execute_kw(self, db, uid, api_key, model, method, args, kwargs):
+        return self._call('object', 'execute_kw', db, uid, api_key, model, method, args, kwargs)
+
+    def close(self):
+        self.client.close()
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'bytes_received': self.bytes_received}
+
+    def is_transient(self, exc):
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in RETRYABLE_STATUS
+        return isinstance(exc, httpx.TransportError)
+
+    def is_access_denied(self, exc):
+        if not isinstance(exc, OdooServerError):
+            return False
+        name = exc.data.get('name', '')
+        return name.endswith('AccessDenied') or name.endswith('SessionExpiredException')
+
+TRANSPORTS = {
+    XmlRpcTransport.name: XmlRpcTransport,
+    JsonRpcTransport.name: JsonRpcTransport,
+}
+
+def create_transport(kind: str, url: str, **settings) -> OdooTransport:
+    """Build the transport named by kind ('xmlrpc' or 'jsonrpc')"""
+    transport_cls = TRANSPORTS.get((kind or 'xmlrpc').lower())
+    if transport_cls is None:
+        raise ValueError(f"Unknown Odoo transport '{kind}', expected one of: {', '.join(TRANSPORTS)}")
+    return transport_cls(url, **settings)
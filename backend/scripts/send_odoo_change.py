@@ -0,0 +1,60 @@
+"""
+Send an Odoo change notification to the dashboard backend
+
+Stands in for the Odoo automated action, so targeted invalidation can be
+tried without a live Odoo. In Odoo the same request is sent from a server
+action on the model (Python code), e.g. for x_stockpile:
+
+    requests.post('https://dashboard.example/api/internal/odoo-changes',
+                  json={'model': 'x_stockpile', 'ids': records.ids},
+                  headers={'X-Webhook-Token': '<ODOO_WEBHOOK_TOKEN>'}, timeout=5)
+
+Wrap it in try/except there: a dashboard that is down must not block saving
+records in Odoo.
+
+Usage (from backend/, token defaults to ODOO_WEBHOOK_TOKEN):
+    python scripts/send_odoo_change.py x_stockpile 12 13
+    python scripts/send_odoo_change.py x_wagon_trip 501 --url http://localhost:8003
+"""
+import argparse
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List
+
+WEBHOOK_PATH = '/api/internal/odoo-changes'
+
+def change_payload(model: str, ids: List[int]) -> Dict[str, Any]:
+    """Body of a change notification, as the Odoo server action sends it"""
+    return {'model': model, 'ids': list(ids)}
+
+def send_change(url: str, token: str, model: str, ids: List[int], timeout: float = 5.0) -> Dict[str, Any]:
+    """POST one notification and return the backend's JSON answer"""
+    request = urllib.request.Request(
+        url.rstrip('/') + WEBHOOK_PATH,
+        data=json.dumps(change_payload(model, ids)).encode('utf-8'),
+        headers={'Content-Type': 'application/json', 'X-Webhook-Token': token},
+        method='POST'
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('model', help='Odoo model that changed, e.g. x_stockpile')
+    parser.add_argument('ids', nargs='*', type=int, help='ids of the changed records')
+    parser.add_argument('--url', default=f"http://localhost:{os.getenv('BACKEND_PORT', '8003')}")
+    parser.add_argument('--token', default=os.getenv('ODOO_WEBHOOK_TOKEN', ''))
+    args = parser.parse_args()
+
+    try:
+        result = send_change(args.url, args.token, args.model, args.ids)
+    except urllib.error.HTTPError as e:
+        print(f"{e.code}: {e.read().decode('utf-8', 'replace')}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+
+if __name__ == '__main__':
+    main()
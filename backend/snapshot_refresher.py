@@ -0,0 +1,337 @@
+"""
+Background refresh of dashboard sections
+
+SnapshotRefresher rebuilds each registered section on its own interval and
+publishes the result in a new immutable Snapshot. Publishing replaces a single
+reference, so readers always see a complete snapshot and never wait for a
+refresh in progress. All refresh tasks run on the event loop thread, which
+makes the copy-on-write swap race-free without a lock.
+
+A section can also have a change probe. Its loop then checks the probe
+first and only recomputes when the underlying data changed (or max_interval
+has passed). While nothing changes the polling interval doubles up to
+max_interval; a detected change drops it back to the base interval.
+
+Data built by another worker (the refresh leader) is published with its
+original build time, so ages and staleness are the same in every worker.
+
+The latest snapshot is also persisted to a gzip-compressed JSON file, so after
+a restart sections can be answered immediately (marked stale) from the last
+known good data while the first live refresh runs.
+"""
+import asyncio
+import gzip
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the persisted file changes; other versions are ignored on load
+SNAPSHOT_FILE_VERSION = 1
+
+class Snapshot:
+    """Every section's latest value and the time it was built; never mutated after creation"""
+    def __init__(self, sections: Dict[str, Tuple[Any, float]], version: int = 0):
+        self.sections = sections
+        self.version = version
+
+def save_snapshot(snapshot: Snapshot, path: str):
+    """Write a snapshot atomically: a temporary file is fsynced, then renamed over path"""
+    payload = {
+        'file_version': SNAPSHOT_FILE_VERSION,
+        'saved_at': time.time(),
+        'sections': {
+            name: {'data': data, 'built_at': built_at}
+            for name, (data, built_at) in snapshot.sections.items()
+        },
+    }
+    body = gzip.compress(json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8'))
+    # Per-process temporary name: several workers may persist the same file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    """Read a persisted snapshot; None if the file is missing, unreadable or from another version"""
+    try:
+        with open(path, 'rb') as f:
+            payload = json.loads(gzip.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot file {path}: {e}")
+        return None
+    if payload.get('file_version') != SNAPSHOT_FILE_VERSION:
+        logger.warning(f"Ignoring snapshot file {path} with version {payload.get('file_version')}")
+        return None
+    return Snapshot({
+        name: (entry['data'], entry['built_at'])
+        for name, entry in payload.get('sections', {}).items()
+    })
+
+class LoadedSection:
+    """
+    Section data built elsewhere, e.g. by the refresh leader in another worker
+    A loader returns it to publish the data with its original build time, and
+    the last time its builder confirmed it unchanged.
+    """
+    def __init__(self, data: Any, built_at: float, verified_at: Optional[float] = None):
+        self.data = data
+        self.built_at = built_at
+        self.verified_at = verified_at
+
+class _Section:
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Any]], interval: float,
+                 probe: Optional[Callable[[], Awaitable[bool]]] = None, max_interval: Optional[float] = None):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.probe = probe
+        self.max_interval = max(interval, max_interval or interval)
+        self.current_interval = interval
+        # Set by request_refresh(): rebuild on the next run whatever the probe says
+        self.dirty = False
+        self.wake = asyncio.Event()
+        # Last time the published value was confirmed current by a probe
+        self.verified_at = 0.0
+        self.refreshed_at = 0.0
+        self.refreshes = 0
+        self.skips = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_duration: Optional[float] = None
+
+class SnapshotRefresher:
+    """
+    Periodically rebuild registered sections in the background
+    A section neither rebuilt nor confirmed unchanged within stale_factor * its
+    max_interval (its refresh keeps failing) is no longer served by get(), so
+    callers fall back to querying Odoo.
+    Sections restored from persist_path are served whatever their age until
+    their first refresh in this process succeeds.
+    """
+    def __init__(self, stale_factor: float = 3.0, persist_path: Optional[str] = None,
+                 persist_interval: float = 30.0):
+        self.stale_factor = stale_factor
+        self.persist_path = persist_path
+        self.persist_interval = persist_interval
+        self._sections: Dict[str, _Section] = {}
+        self._snapshot = Snapshot({})
+        self._restored = set()
+        self._persisted_version = 0
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.on_publish: Optional[Callable[[str, Any, float], None]] = None
+        # Awaited when a probe confirms a section unchanged, with the time of the check
+        self.on_verify: Optional[Callable[[str, float], Awaitable[None]]] = None
+        # The snapshot file is only written while this returns True (default: always)
+        self.should_persist: Optional[Callable[[], bool]] = None
+
+    def add_section(self, name: str, loader: Callable[[], Awaitable[Any]], interval: float,
+                    probe: Optional[Callable[[], Awaitable[bool]]] = None, max_interval: Optional[float] = None):
+        """
+        Register a section rebuilt every interval seconds
+        With a probe (async, True when the source data changed) the section is only
+        rebuilt on changes, and at least every max_interval seconds.
+        """
+        if interval > 0:
+            self._sections[name] = _Section(name, loader, interval, probe, max_interval)
+
+    @property
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def get(self, name: str) -> Optional[Tuple[Any, float]]:
+        """Return (data, age_seconds) of a section, or None if it's missing or too old"""
+        entry = self._snapshot.sections.get(name)
+        section = self._sections.get(name)
+        if entry is None or section is None:
+            return None
+        data, built_at = entry
+        now = time.time()
+        unverified = now - max(built_at, section.verified_at)
+        if unverified > section.max_interval * self.stale_factor and name not in self._restored:
+            return None
+        return data, now - built_at
+
+    def is_stale(self, name: str) -> bool:
+        """
+        True when a served section may be behind Odoo: restored from disk, its last
+        refresh failed, or it was neither rebuilt nor confirmed unchanged on schedule
+        """
+        entry = self._snapshot.sections.get(name)
+        section = self._sections.get(name)
+        if entry is None or section is None or name in self._restored or section.last_error is not None:
+            return True
+        unverified = time.time() - max(entry[1], section.verified_at)
+        # A rebuild in progress takes about as long as the last one did
+        return unverified > section.current_interval + (section.last_duration or 0)
+
+    def is_restored(self, name: str) -> bool:
+        """True while a section still holds the value restored from disk"""
+        return name in self._restored
+
+    def restore(self) -> int:
+        """Publish the persisted snapshot for registered sections; returns how many were restored"""
+        if not self.persist_path:
+            return 0
+        snapshot = load_snapshot(self.persist_path)
+        if snapshot is None:
+            return 0
+        sections = {name: entry for name, entry in snapshot.sections.items() if name in self._sections}
+        self._snapshot = Snapshot(sections, self._snapshot.version + 1)
+        self._persisted_version = self._snapshot.version
+        self._restored = set(sections)
+        if self.on_publish is not None:
+            for name, (data, built_at) in sections.items():
+                self.on_publish(name, data, built_at)
+        logger.info(f"Restored {len(sections)} dashboard sections from {self.persist_path}")
+        return len(sections)
+
+    async def persist(self):
+        """Write the current snapshot to persist_path if it changed since the last write"""
+        snapshot = self._snapshot
+        if not self.persist_path or snapshot.version == self._persisted_version:
+            return
+        if self.should_persist is not None and not self.should_persist():
+            return
+        try:
+            await asyncio.to_thread(save_snapshot, snapshot, self.persist_path)
+            self._persisted_version = snapshot.version
+        except Exception as e:
+            logger.warning(f"Could not persist dashboard snapshot to {self.persist_path}: {e}")
+
+    def publish(self, name: str, data: Any, built_at: Optional[float] = None):
+        """Swap in a new snapshot containing data for one section, built at built_at (default: now)"""
+        current = self._snapshot
+        sections = dict(current.sections)
+        built_at = built_at or time.time()
+        sections[name] = (data, built_at)
+        self._snapshot = Snapshot(sections, current.version + 1)
+        self._restored.discard(name)
+        if self.on_publish is not None:
+            self.on_publish(name, data, built_at)
+
+    async def refresh(self, name: str):
+        """
+        Rebuild one section now; on failure the previous value stays published
+        A loader may return None when it has nothing new, which also keeps the
+        previous value, or a LoadedSection built elsewhere. Sections with a probe
+        are skipped while it reports no change.
+        """
+        section = self._sections[name]
+        if section.probe is not None and not await self._changed(section):
+            section.skips += 1
+            section.verified_at = time.time()
+            section.current_interval = min(section.current_interval * 2, section.max_interval)
+            if self.on_verify is not None:
+                await self.on_verify(name, section.verified_at)
+            return
+        section.current_interval = section.interval
+        # Cleared before loading, so a notification arriving mid-load triggers another run
+        section.dirty = False
+        started = time.monotonic()
+        try:
+            data = await section.loader()
+        except Exception as e:
+            section.failures += 1
+            section.last_error = str(e)
+            # The probe has already taken in the change; rebuild on the next run regardless
+            section.dirty = True
+            logger.warning(f"Background refresh of {name} failed: {e}")
+            return
+        if data is None:
+            return
+        section.refreshes += 1
+        section.refreshed_at = time.monotonic()
+        section.last_error = None
+        section.last_duration = time.monotonic() - started
+        if not isinstance(data, LoadedSection):
+            self.publish(name, data)
+            return
+        section.verified_at = max(section.verified_at, data.verified_at or data.built_at)
+        held = self._snapshot.sections.get(name)
+        # Re-reading the same build changes nothing; a restored value is replaced all the same
+        if held is None or held[1] < data.built_at or name in self._restored:
+            self.publish(name, data.data, data.built_at)
+
+    def request_refresh(self, name: str) -> bool:
+        """Rebuild a section as soon as possible, e.g. on a change notification; False if unknown"""
+        section = self._sections.get(name)
+        if section is None:
+            return False
+        section.dirty = True
+        section.wake.set()
+        return True
+
+    async def _changed(self, section: _Section) -> bool:
+        """Whether a probed section needs rebuilding; a failing probe counts as a change"""
+        try:
+            # Always probed first, so the probe's baseline is set before any load
+            changed = await section.probe()
+        except Exception as e:
+            logger.warning(f"Change probe for {section.name} failed, refreshing: {e}")
+            return True
+        if section.dirty or section.name not in self._snapshot.sections or section.name in self._restored:
+            return True
+        # write_date misses deletions, so rebuild at least every max_interval
+        return changed or time.monotonic() - section.refreshed_at >= section.max_interval
+
+    async def _run(self, section: _Section):
+        while True:
+            await self.refresh(section.name)
+            try:
+                await asyncio.wait_for(section.wake.wait(), timeout=section.current_interval)
+            except asyncio.TimeoutError:
+                pass
+            section.wake.clear()
+
+    async def _persist_loop(self):
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            await self.persist()
+
+    def start(self):
+        """Start one refresh loop per section (and the persist loop) on the running event loop"""
+        for name, section in self._sections.items():
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._run(section), name=f'refresh-{name}')
+        if self.persist_path and '_persist' not in self._tasks:
+            self._tasks['_persist'] = asyncio.create_task(self._persist_loop(), name='persist-snapshot')
+        logger.info(f"Background refresh started for {len(self._sections)} dashboard sections")
+
+    async def stop(self):
+        """Cancel the loops and write the latest snapshot one last time"""
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.persist()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        now = time.time()
+        return {
+            'running': bool(self._tasks),
+            'version': snapshot.version,
+            'persisted_version': self._persisted_version,
+            'restored': sorted(self._restored),
+            'sections': {
+                name: {
+                    'interval': section.interval,
+                    'current_interval': section.current_interval,
+                    'age_seconds': round(now - snapshot.sections[name][1], 1) if name in snapshot.sections else None,
+                    'refreshes': section.refreshes,
+                    'skips': section.skips,
+                    'failures': section.failures,
+                    'last_error': section.last_error,
+                    'last_duration_ms': round(section.last_duration * 1000, 1) if section.last_duration is not None else None,
+                }
+                for name, section in self._sections.items()
+            },
+        }
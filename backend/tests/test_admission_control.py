@@ -0,0 +1,42 @@
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission_control import AdmissionController
+
+
+def test_user_bucket_limits_a_single_caller():
+    controller = AdmissionController(global_rate=0, global_burst=1000, user_rate=0, user_burst=10)
+    assert controller.admit('alice', 6) == (True, 0.0)
+    admitted, retry_after = controller.admit('alice', 6)
+    assert not admitted
+    # Other users have their own bucket
+    assert controller.admit('bob', 6)[0]
+
+
+def test_retry_after_reflects_refill_rate():
+    controller = AdmissionController(global_rate=100, global_burst=1000, user_rate=2, user_burst=4)
+    assert controller.admit('alice', 4)[0]
+    admitted, retry_after = controller.admit('alice', 4)
+    assert not admitted
+    assert retry_after == pytest.approx(2.0, abs=0.1)
+
+
+def test_reserve_keeps_capacity_for_cheap_requests():
+    controller = AdmissionController(global_rate=0, global_burst=100, user_rate=0, user_burst=1000,
+                                     cheap_cost=4, reserve_fraction=0.25)
+    # Expensive queries may only drain the global bucket down to the reserve
+    assert controller.admit('analyst', 50)[0]
+    assert controller.admit('analyst', 25)[0]
+    assert not controller.admit('analyst', 20)[0]
+    # Wallboard refreshes can still use the reserved tokens
+    for _ in range(6):
+        assert controller.admit('wallboard', 4)[0]
+
+
+def test_oversized_cost_is_clamped_to_bucket_capacity():
+    controller = AdmissionController(global_rate=0, global_burst=1000, user_rate=0, user_burst=10)
+    assert controller.admit('alice', 500)[0]
+    assert not controller.admit('alice', 1)[0]
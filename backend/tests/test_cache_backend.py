@@ -0,0 +1,138 @@
+import subprocess
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backend import SqliteCacheBackend, create_cache_backend
+from dashboard_cache import ResponseCache
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(params=["sqlite"])
+def backend(request, tmp_path):
+    backend = create_cache_backend(request.param, path=str(tmp_path / "cache.sqlite3"))
+    yield backend
+    backend.close()
+
+
+def test_entries_expire(backend):
+    backend.set("stockpiles", {"NDP": [1, 2]}, ttl=0.05)
+    value, expires_at = backend.get("stockpiles")
+    assert value == {"NDP": [1, 2]}
+    assert expires_at > time.time()
+
+    time.sleep(0.1)
+    assert backend.get("stockpiles") is None
+
+
+def test_delete_and_clear(backend):
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.delete("a")
+    assert backend.get("a") is None
+    backend.clear()
+    assert backend.get("b") is None
+
+
+def test_sqlite_entries_are_visible_to_other_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from cache_backend import SqliteCacheBackend;"
+        "SqliteCacheBackend(sys.argv[2]).set('\"first_mile_truck\"', {'total_orders': 7}, 60)"
+    )
+    subprocess.run([sys.executable, "-c", writer, BACKEND_DIR, path], check=True)
+
+    backend = SqliteCacheBackend(path)
+    assert backend.get('"first_mile_truck"')[0] == {"total_orders": 7}
+    backend.close()
+
+
+def test_sqlite_purges_entries_beyond_the_limit(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=3, purge_every=5)
+    for i in range(5):
+        backend.set(f"k{i}", i, ttl=60)
+    assert backend.stats()["entries"] == 3
+    assert backend.get("k4") == (4, pytest.approx(time.time() + 60, abs=5))
+    backend.close()
+
+
+def test_response_cache_falls_through_to_the_shared_tier(tmp_path):
+    shared = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"))
+    worker_a = ResponseCache(shared=shared)
+    worker_b = ResponseCache(shared=SqliteCacheBackend(shared.path), local_ttl=0.05)
+
+    worker_a.put(("first_mile_truck", "2025-01-01"), {"total_orders": 2})
+    assert worker_b.get(("first_mile_truck", "2025-01-01")) == {"total_orders": 2}
+    assert worker_b.stats()["shared_hits"] == 1
+
+    # Served from the local tier until local_ttl, then read through again
+    worker_b.get(("first_mile_truck", "2025-01-01"))
+    assert worker_b.stats()["hits"] == 1
+    time.sleep(0.1)
+    worker_b.get(("first_mile_truck", "2025-01-01"))
+    assert worker_b.stats()["shared_hits"] == 2
+
+    shared.close()
+    worker_b.shared.close()
+
+
+def test_sections_are_invalidated_in_both_tiers(tmp_path):
+    shared = SqliteCacheBackend(str(tmp_path / "cache.sqlite3"))
+    worker_a = ResponseCache(shared=shared)
+    worker_b = ResponseCache(shared=SqliteCacheBackend(shared.path))
+
+    worker_a.put("train_departures", {"trains": []})
+    worker_a.put(("train_departures", 30), {"trains": []})
+    worker_a.put("train_departures_extra", {"trains": []})
+    worker_b.put(("train_departures", 7), {"trains": []})
+
+    assert worker_a.invalidate_section("train_departures") == 2
+    for key in ["train_departures", ("train_departures", 30), ("train_departures", 7)]:
+        assert worker_a.get(key) is None
+    # Only exact section names match, '_' is not a wildcard
+    assert worker_a.get("train_departures_extra") == {"trains": []}
+
+    shared.close()
+    worker_b.shared.close()
+
+
+def test_async_access_keeps_the_shared_tier_off_the_event_loop(tmp_path):
+    import asyncio
+    import threading
+
+    class RecordingBackend(SqliteCacheBackend):
+        def get(self, key):
+            threads.add(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value, ttl):
+            threads.add(threading.get_ident())
+            super().set(key, value, ttl)
+
+    threads = set()
+    shared = RecordingBackend(str(tmp_path / "cache.sqlite3"))
+    writer, reader = ResponseCache(shared=shared), ResponseCache(shared=shared)
+
+    async def run():
+        await writer.put_async("stockpiles", {"NDP": []})
+        assert await reader.get_async("stockpiles") == {"NDP": []}
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) >= 1 and loop_thread not in threads
+    assert reader.stats()["shared_hits"] == 1
+    shared.close()
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_cache_backend("redis")
+    # memory means no shared tier
+    assert create_cache_backend("memory") is None
+    assert create_cache_backend(None) is None
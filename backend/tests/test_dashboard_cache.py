@@ -0,0 +1,40 @@
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_cache import ResponseCache
+
+
+def test_entries_expire_after_their_section_ttl():
+    cache = ResponseCache(default_ttl=60, ttls={"first_mile_truck": 0.05})
+    cache.put("first_mile_truck", {"total": 1})
+    cache.put("stockpiles", {"NDP": []})
+    assert cache.get("first_mile_truck") == {"total": 1}
+
+    time.sleep(0.1)
+    assert cache.get("first_mile_truck") is None
+    assert cache.get("stockpiles") == {"NDP": []}
+
+
+def test_parameterised_keys_share_the_section_ttl():
+    cache = ResponseCache(default_ttl=60, ttls={"train_departures": 0})
+    cache.put(("train_departures", 14), {"departures": []})
+    assert cache.get(("train_departures", 14)) is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (3, 1)
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leader_election import LeaderLease
+
+
+def test_only_one_worker_holds_the_lease(tmp_path):
+    path = str(tmp_path / "lease.sqlite3")
+    workers = [LeaderLease(path, lease_ttl=30) for _ in range(3)]
+
+    assert [w.try_acquire() for w in workers] == [True, False, False]
+    # Renewal by the holder keeps it; the others still can't take it
+    assert [w.try_acquire() for w in workers] == [True, False, False]
+
+
+def test_lease_fails_over_when_the_leader_stops_renewing(tmp_path):
+    path = str(tmp_path / "lease.sqlite3")
+    leader, follower = LeaderLease(path, lease_ttl=0.1), LeaderLease(path, lease_ttl=0.1)
+    changes = []
+    follower.on_change = changes.append
+
+    assert leader.try_acquire()
+    assert not follower.try_acquire()
+
+    time.sleep(0.15)  # leader died without renewing
+    assert follower.try_acquire()
+    assert changes == [True]
+    assert not leader.try_acquire()
+    assert not leader.is_leader
+
+
+def test_release_hands_over_immediately(tmp_path):
+    path = str(tmp_path / "lease.sqlite3")
+    leader, follower = LeaderLease(path, lease_ttl=30), LeaderLease(path, lease_ttl=30)
+    leader.try_acquire()
+
+    async def stop():
+        await leader.stop()
+
+    asyncio.run(stop())
+    assert not leader.is_leader
+    assert follower.try_acquire()
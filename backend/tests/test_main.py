@@ -87,3 +87,163 @@ def test_dashboard_endpoints_structure(mock_odoo_api, endpoint):
     response = client.get(endpoint)
     # Should either return 200 with data or handle errors gracefully
     assert response.status_code in [200, 500]  # 500 if Odoo connection fails
+
+
+@pytest.fixture
+def executive_user():
+    """Bypass JWT auth with an executive-level user"""
+    from types import SimpleNamespace
+    from auth_dependencies import get_current_active_user
+    from database import UserRole
+
+    user = SimpleNamespace(username="wallboard", role=UserRole.EXECUTIVE, is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield
+    app.dependency_overrides.clear()
+
+
+def test_dashboard_all_returns_partial_results_at_deadline(executive_user, monkeypatch):
+    """Slow sections are reported as timed out while fast sections still return"""
+    import asyncio
+    import main
+    from dashboard_cache import LastGoodCache, ResponseCache
+
+    async def fast(*args):
+        return {"total_orders": 1}
+
+    async def slow(*args):
+        await asyncio.sleep(2)
+        return {"NDP": []}
+
+    monkeypatch.setattr(main, "last_good", LastGoodCache())
+    monkeypatch.setattr(main, "response_cache", ResponseCache())
+    for name in ["get_forwarding_orders_train_data_async", "get_first_mile_truck_data_async",
+                 "get_last_mile_truck_data_async"]:
+        monkeypatch.setattr(main.odoo_api, name, fast)
+    monkeypatch.setattr(main.odoo_api, "get_stockpile_utilization_async", slow)
+
+    response = client.get("/api/dashboard/all?deadline_ms=200")
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["data"]["first_mile_truck"] == {"total_orders": 1}
+    assert body["data"]["stockpiles"] == {"status": "timeout"}
+    assert body["sections"]["forwarding_orders"]["status"] == "ok"
+    assert body["sections"]["stockpiles"]["status"] == "timeout"
+
+
+def test_dashboard_sections_are_shared_through_response_cache(executive_user, monkeypatch):
+    """Repeated refreshes within the TTL are served without querying Odoo again"""
+    import main
+    from dashboard_cache import LastGoodCache, ResponseCache
+
+    calls = []
+
+    async def loader(*args):
+        calls.append(args)
+        return {"total_orders": len(calls)}
+
+    monkeypatch.setattr(main, "last_good", LastGoodCache())
+    monkeypatch.setattr(main, "response_cache", ResponseCache(default_ttl=60))
+    for name in ["get_forwarding_orders_train_data_async", "get_first_mile_truck_data_async",
+                 "get_last_mile_truck_data_async", "get_stockpile_utilization_async"]:
+        monkeypatch.setattr(main.odoo_api, name, loader)
+
+    first = client.get("/api/dashboard/all").json()
+    assert len(calls) == 5
+
+    second = client.get("/api/dashboard/all").json()
+    assert len(calls) == 5
+    assert second["data"] == first["data"]
+
+    # Individual endpoints share the entries computed for the aggregate one
+    assert client.get("/api/dashboard/first-mile-truck").json()["data"] == first["data"]["first_mile_truck"]
+    assert len(calls) == 5
+    assert main.response_cache.stats()["hits"] == 6
+
+
+def test_date_range_endpoints_validate_the_range(executive_user):
+    """Reversed, oversized and future ranges are rejected before reaching Odoo"""
+    assert client.get("/api/dashboard/first-mile-truck/range?start=2025-01-10&end=2025-01-01").status_code == 400
+    assert client.get("/api/dashboard/last-mile-truck/ICAD/range?start=2024-01-01&end=2025-01-01").status_code == 400
+    assert client.get("/api/dashboard/last-mile-truck/ICAD/range?start=2025-01-01&end=2999-01-01").status_code == 400
+    assert client.get("/api/dashboard/last-mile-truck/XYZ/range?start=2025-01-01&end=2025-01-02").status_code == 400
+
+
+def test_odoo_change_notifications_refresh_only_affected_sections(monkeypatch):
+    """An x_stockpile change invalidates and rebuilds stockpiles, nothing else"""
+    import main
+    from dashboard_cache import ResponseCache
+    from scripts.send_odoo_change import change_payload
+
+    refreshes = []
+    monkeypatch.setattr(main.snapshot_refresher, "request_refresh", lambda name: refreshes.append(name) or True)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(default_ttl=60))
+    main.response_cache.put("stockpiles", {"NDP": []})
+    main.response_cache.put("siji_loading_progress", {"trains": []})
+
+    url = "/api/internal/odoo-changes"
+    monkeypatch.delenv("ODOO_WEBHOOK_TOKEN", raising=False)
+    assert client.post(url, json=change_payload("x_stockpile", [12])).status_code == 503
+
+    monkeypatch.setenv("ODOO_WEBHOOK_TOKEN", "s3cret")
+    assert client.post(url, json=change_payload("x_stockpile", [12]),
+                       headers={"X-Webhook-Token": "wrong"}).status_code == 401
+
+    response = client.post(url, json=change_payload("x_stockpile", [12, 13]), headers={"X-Webhook-Token": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["sections"] == ["stockpiles"]
+    assert refreshes == ["stockpiles"]
+    assert main.response_cache.get("stockpiles") is None
+    assert main.response_cache.get("siji_loading_progress") == {"trains": []}
+
+    response = client.post(url, json=change_payload("x_wagon_trip", [501]), headers={"X-Webhook-Token": "s3cret"})
+    assert response.json()["sections"] == ["siji_loading_progress"]
+    assert main.response_cache.get("siji_loading_progress") is None
+
+
+def test_snapshot_served_while_refresh_fails_is_marked_stale(executive_user, monkeypatch):
+    """A background section whose refresh fails keeps being served, with stale and its age"""
+    import asyncio
+    import main
+    from snapshot_refresher import SnapshotRefresher
+
+    results = iter([{"NDP": []}, RuntimeError("Odoo down")])
+
+    async def loader():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    refresher = SnapshotRefresher()
+    refresher.add_section("stockpiles", loader, interval=60)
+    monkeypatch.setattr(main, "snapshot_refresher", refresher)
+
+    asyncio.run(refresher.refresh("stockpiles"))
+    assert client.get("/api/dashboard/stockpiles").json()["stale"] is False
+
+    asyncio.run(refresher.refresh("stockpiles"))
+    body = client.get("/api/dashboard/stockpiles").json()
+    assert body["data"] == {"NDP": []}
+    assert body["stale"] is True
+    assert body["age_seconds"] is not None
+
+
+def test_forbidden_requests_are_not_charged(monkeypatch):
+    """The role check runs before admission, so a 403 spends no tokens"""
+    from types import SimpleNamespace
+    from auth_dependencies import get_current_active_user
+    from admission_control import AdmissionController
+    from database import UserRole
+
+    controller = AdmissionController()
+    monkeypatch.setattr("admission_control.admission_controller", controller)
+    user = SimpleNamespace(username="visitor", role=UserRole.VISITOR, is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        assert client.get("/api/dashboard/stockpiles").status_code == 403
+    finally:
+        app.dependency_overrides.clear()
+    assert controller.stats()["admitted"] == 0
+    assert controller.stats()["tracked_users"] == 0
@@ -0,0 +1,158 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from odoo_api import OdooAPI
+
+
+def ndp_silo(i, fwo):
+    return {
+        'id': i, 'x_name': f'Silo {i}', 'x_studio_terminal': 'NDP', 'x_studio_show_in_dashboard': True,
+        'x_studio_capacity': 1000.0, 'x_studio_quantity_in_stock_t': 500.0,
+        'x_studio_material': [i % 2 + 1, f'Material {i % 2 + 1}'], 'x_studio_last_fwo': fwo,
+    }
+
+
+@pytest.fixture
+def odoo(monkeypatch):
+    """OdooAPI whose execute_kw answers from canned data and records every call"""
+    api = OdooAPI()
+    api.calls = []
+    api.silos = []
+    api.groups = []
+
+    def execute_kw(model, method, args=None, kwargs=None, cache=True):
+        api.calls.append((model, method))
+        if model == 'x_stockpile':
+            return api.silos
+        if model == 'x_fwo':
+            return [{'id': 70, 'x_name': 'FWO/0070', 'write_date': '2025-01-01 08:00:00'}]
+        if method == 'read_group':
+            return api.groups
+        return []
+
+    monkeypatch.setattr(api, 'execute_kw', execute_kw)
+    return api
+
+
+@pytest.mark.parametrize('silo_count', [2, 20])
+def test_stockpile_round_trips_do_not_grow_with_silos(odoo, silo_count):
+    odoo.silos = [ndp_silo(i, 'FWO/0070' if i % 2 else 'FWO/0071') for i in range(silo_count)]
+    odoo.groups = [
+        {'x_studio_forwarding_order_selectable': [70, 'FWO/0070'], 'x_studio_material': [2, 'Material 2'],
+         'x_studio_selection_field_1d4_1icdknqu2': 'Train Departed', '__count': 4,
+         'x_studio_actual_date_and_time_of_gate_in': '2025-01-02 06:00:00'},
+        {'x_studio_forwarding_order_selectable': [70, 'FWO/0070'], 'x_studio_material': [2, 'Material 2'],
+         'x_studio_selection_field_1d4_1icdknqu2': 'Gate-in Completed', '__count': 3,
+         'x_studio_actual_date_and_time_of_gate_in': '2025-01-01 23:00:00'},
+        # Pair from the FWO x material cross product that no silo has
+        {'x_studio_forwarding_order_selectable': [70, 'FWO/0070'], 'x_studio_material': [1, 'Material 1'],
+         'x_studio_selection_field_1d4_1icdknqu2': 'Train Departed', '__count': 9,
+         'x_studio_actual_date_and_time_of_gate_in': '2024-12-01 00:00:00'},
+    ]
+
+    ndp = odoo.get_stockpile_utilization()['NDP']
+
+    # Stockpiles, reference data load (materials, FWOs), one lookup of the unknown FWO, one read_group
+    assert odoo.calls == [('x_stockpile', 'search_read'), ('x_material', 'search_read'),
+                          ('x_fwo', 'search_read'), ('x_fwo', 'search_read'),
+                          ('x_first_mile_freight', 'read_group')]
+    silo = ndp[1]
+    assert silo['truck_completed_count'] == 4
+    assert silo['first_truck_gate_in'] == '2025-01-01 23:00:00'
+    # FWO/0071 doesn't exist in Odoo
+    assert ndp[0]['truck_completed_count'] == 0
+    assert ndp[0]['first_truck_gate_in'] == 'N/A'
+
+
+def day_group(terminal, field, day_start_utc, count, weight=None):
+    group = {'x_studio_terminal': terminal, '__count': count,
+             '__range': {f'{field}:day': {'from': day_start_utc, 'to': ''}}}
+    if weight is not None:
+        group['x_studio_net_weight_ton'] = weight
+    return group
+
+
+def test_last_mile_terminals_and_days_share_two_read_groups(odoo, monkeypatch):
+    from datetime import date
+
+    gate_out = 'x_studio_actual_date_and_time_of_gate_out'
+    gate_in = 'x_studio_scheduled_truck_gate_in_date_time'
+    executed = [
+        # UAE midnight of 2 and 3 January in UTC
+        day_group('ICAD', gate_out, '2025-01-01 20:00:00', 5, 150.5),
+        day_group('DIC', gate_out, '2025-01-02 20:00:00', 2, 60.0),
+    ]
+    confirmed = [day_group('ICAD', gate_in, '2025-01-02 20:00:00', 7)]
+    requests = []
+
+    def execute_kw(model, method, args=None, kwargs=None):
+        requests.append((model, method, args[2], kwargs))
+        return executed if args[2][1].startswith(gate_out) else confirmed
+
+    monkeypatch.setattr(odoo, 'execute_kw', execute_kw)
+
+    data = odoo.get_last_mile_truck_data_multi(['ICAD', 'DIC'], date(2025, 1, 3))
+
+    assert len(requests) == 2
+    assert all(kwargs['context'] == {'tz': 'Asia/Dubai'} for _, _, _, kwargs in requests)
+    assert data['ICAD']['terminal'] == 'ICAD'
+    assert (data['ICAD']['total_orders'], data['ICAD']['confirmed_orders']) == (0, 7)
+    assert data['ICAD']['yesterday'] == {'total_orders': 5, 'total_weight': 150.5, 'confirmed_orders': 0}
+    assert (data['DIC']['total_orders'], data['DIC']['total_weight']) == (2, 60.0)
+
+    # Closed days are kept: the single-terminal path needs no further calls
+    assert odoo.get_last_mile_truck_data('DIC', date(2025, 1, 3)) == data['DIC']
+    assert odoo.get_last_mile_truck_range('ICAD', date(2025, 1, 2), date(2025, 1, 3))['days'][0] == {
+        'date': '2025-01-02', 'total_orders': 5, 'total_weight': 150.5, 'confirmed_orders': 0
+    }
+    assert len(requests) == 2
+
+
+def test_first_mile_trend_is_one_day_bucketed_read_group(odoo, monkeypatch):
+    from datetime import datetime, timedelta
+
+    today = datetime.now(odoo.uae_tz).date()
+    field = 'x_studio_actual_date_and_time_of_gate_out'
+    requests = []
+
+    def execute_kw(model, method, args=None, kwargs=None):
+        requests.append((model, method, args[2]))
+        return [{'__count': 3, 'x_studio_net_weight_ton': 90.0,
+                 '__range': {f'{field}:day': {'from': odoo.get_day_range(today - timedelta(days=2))[0], 'to': ''}}}]
+
+    monkeypatch.setattr(odoo, 'execute_kw', execute_kw)
+
+    trend = odoo.get_first_mile_trend(30)
+
+    assert requests == [('x_first_mile_freight', 'read_group', [f'{field}:day'])]
+    assert len(trend['days']) == 30
+    assert trend['days'][-1]['date'] == today.isoformat()
+    assert trend['days'][-3] == {'date': (today - timedelta(days=2)).isoformat(), 'total_orders': 3, 'total_weight': 90.0}
+    assert trend['days'][0]['total_orders'] == 0
+
+    # Closed days are cached: today (and yesterday, within the grace period) are all that's left
+    odoo.get_first_mile_trend(30)
+    assert len(requests) == 2
+    assert requests[1][2] == [f'{field}:day']
+
+
+def test_forwarding_orders_query_is_not_cached():
+    api = OdooAPI()
+    requests = []
+
+    def execute_kw(model, method, args=None, kwargs=None):
+        requests.append((model, method))
+        return []
+
+    api._execute_kw = execute_kw
+    try:
+        api.get_forwarding_orders_train_data()
+        api.get_forwarding_orders_train_data()
+        # The domain ends at the current second: storing it would only evict useful entries
+        assert requests.count(('x_fwo', 'search_read')) == 2
+        assert api.query_cache.stats()['entries'] == 0
+    finally:
+        api.close()
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_api2 import odoo_api2
+
+CONTAINERS = (
+    [{'x_studio_location': 'RUW', 'x_studio_filled': True}] * 3
+    + [{'x_studio_location': 'RUW', 'x_studio_filled': False}] * 5
+    + [{'x_studio_location': 'ICAD', 'x_studio_filled': True}] * 2
+)
+
+
+def read_group(domain, groupby):
+    """Odoo's read_group over CONTAINERS, for '=' domains"""
+    counts = {}
+    for container in CONTAINERS:
+        if all(container[field] == value for field, _, value in domain):
+            key = tuple(container[field] for field in groupby)
+            counts[key] = counts.get(key, 0) + 1
+    return [{**dict(zip(groupby, key)), '__count': count} for key, count in counts.items()]
+
+
+def fake_execute_kw(calls):
+    def execute_kw(model, method, args=None, kwargs=None):
+        calls.append(method)
+        if method == 'read_group':
+            domain, fields, groupby = args
+            assert kwargs == {'lazy': False}
+            return read_group(domain, groupby)
+        return [{'id': 1, 'x_name': 'CONT0000001'}]
+    return execute_kw
+
+
+def test_ruw_stats_come_from_one_read_group(monkeypatch):
+    calls = []
+    monkeypatch.setattr(odoo_api2, 'execute_kw', fake_execute_kw(calls))
+
+    stats = odoo_api2.get_ruw_container_stats()
+
+    assert calls == ['read_group', 'search_read']
+    assert (stats['total'], stats['loaded'], stats['empty']) == (8, 3, 5)
+    assert (stats['loaded_percentage'], stats['empty_percentage']) == (37.5, 62.5)
+    assert stats['recent_containers'] == [{'id': 1, 'x_name': 'CONT0000001'}]
+
+
+def test_all_locations_stats_keep_their_shape(monkeypatch):
+    calls = []
+    monkeypatch.setattr(odoo_api2, 'execute_kw', fake_execute_kw(calls))
+
+    stats = odoo_api2.get_all_locations_container_stats()
+
+    assert calls == ['read_group']
+    assert stats['locations'] == [
+        {'location': 'RUW', 'total': 8, 'loaded': 3, 'empty': 5, 'loaded_percentage': 37.5, 'empty_percentage': 62.5},
+        {'location': 'ICAD', 'total': 2, 'loaded': 2, 'empty': 0, 'loaded_percentage': 100.0, 'empty_percentage': 0.0},
+    ]
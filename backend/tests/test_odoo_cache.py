@@ -0,0 +1,129 @@
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_cache import QueryCache, canonical_call, parse_ttls
+from odoo_resilience import call_key
+
+
+def key(method, args=None, kwargs=None):
+    return call_key('Odoo', 'x_fwo', method, *canonical_call(method, args, kwargs))
+
+
+def test_equivalent_calls_share_a_key():
+    a = key('search_read',
+            [[['x_name', 'in', ['FWO/2', 'FWO/1']], ['x_studio_train_id', '!=', False]]],
+            {'fields': ['x_name', 'id'], 'limit': 5})
+    b = key('search_read',
+            [[('x_studio_train_id', '!=', False), ('x_name', 'in', ['FWO/1', 'FWO/2', 'FWO/1'])]],
+            {'limit': 5, 'fields': ['id', 'x_name']})
+    assert a == b
+
+
+def test_order_sensitive_arguments_are_kept():
+    # Prefix operators give leaf order a meaning
+    assert key('search', [['|', ['a', '=', 1], '&', ['b', '=', 2], ['c', '=', 3]]]) != \
+        key('search', [['|', ['b', '=', 2], '&', ['a', '=', 1], ['c', '=', 3]]])
+    # read returns records in the order of the ids requested
+    assert key('read', [[2, 1]]) != key('read', [[1, 2]])
+    # groupby order changes the shape of read_group results
+    assert key('read_group', [[], ['x_qty'], ['a', 'b']]) != key('read_group', [[], ['x_qty'], ['b', 'a']])
+
+
+def test_ttl_lookup_prefers_model_and_method():
+    cache = QueryCache(ttls=parse_ttls('x_fwo=300, x_fwo.search_count=60'), default_ttl=0)
+    assert cache.ttl_for('x_fwo', 'search_count') == 60
+    assert cache.ttl_for('x_fwo', 'search_read') == 300
+    assert cache.ttl_for('x_container', 'search_read') == 0
+
+
+def test_entries_expire_and_are_copied():
+    cache = QueryCache()
+    records = [{'id': 1, 'x_name': 'FWO/1'}]
+    cache.put('k', 'x_fwo', records, ttl=0.05)
+    records[0]['x_name'] = 'mutated'
+
+    found, value = cache.get('k')
+    assert found and value == [{'id': 1, 'x_name': 'FWO/1'}]
+    value[0]['extra'] = True
+    assert cache.get('k')[1] == [{'id': 1, 'x_name': 'FWO/1'}]
+
+    time.sleep(0.1)
+    assert cache.get('k') == (False, None)
+
+
+def test_lru_is_bounded_by_entries_and_bytes():
+    cache = QueryCache(max_entries=2)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, 'x_fwo', [name], ttl=60)
+    assert not cache.get('a')[0]
+    assert cache.stats()['entries'] == 2
+
+    cache = QueryCache(max_bytes=100)
+    cache.put('small', 'x_fwo', 'x' * 45, ttl=60)
+    cache.put('other', 'x_fwo', 'y' * 45, ttl=60)
+    assert cache.stats()['bytes'] <= 100
+    assert not cache.get('small')[0]
+    assert cache.get('other')[0]
+
+
+def test_invalidate_model_only_drops_that_model():
+    cache = QueryCache()
+    cache.put('fwo', 'x_fwo', 1, ttl=60)
+    cache.put('material', 'x_material', 2, ttl=60)
+    assert cache.invalidate_model('x_fwo') == 1
+    assert not cache.get('fwo')[0]
+    assert cache.get('material')[0]
+
+
+def test_day_cache_invalidates_a_date_range():
+    from datetime import date
+    from odoo_cache import DayCache
+
+    cache = DayCache()
+    for day in (1, 2, 3):
+        cache.put(('first_mile', date(2025, 1, day)), day)
+    cache.put(('last_mile', 'ICAD', date(2025, 1, 2)), 'icad')
+
+    assert cache.invalidate(date(2025, 1, 2), date(2025, 1, 2)) == 2
+    assert cache.get(('first_mile', date(2025, 1, 2))) is None
+    assert cache.get(('first_mile', date(2025, 1, 3))) == 3
+    assert cache.invalidate() == 2
+
+
+def test_closed_days_are_fetched_once():
+    from datetime import datetime, timedelta
+    from odoo_api import OdooAPI
+
+    api = OdooAPI()
+    calls = []
+    today = datetime.now(api.uae_tz).date()
+    week_ago = today - timedelta(days=7)
+
+    def execute_kw(model, method, args=None, kwargs=None):
+        calls.append(args[0][-1][2])  # upper bound of the day window
+        if method == 'read_group':
+            # One truck on week_ago, bucketed by day at UAE midnight
+            return [{'x_studio_terminal': 'ICAD', '__count': 1, 'x_studio_net_weight_ton': 10,
+                     '__range': {args[2][-1]: {'from': api.get_day_range(week_ago)[0]}}}]
+        return [{'x_studio_net_weight_ton': 10}] if method == 'search_read' else 1
+
+    api.execute_kw = execute_kw
+    try:
+        api.get_first_mile_truck_data()
+        api.get_first_mile_truck_data()
+        # One query per call covers both days; yesterday is kept once it has closed
+        assert len(calls) == 2
+        yesterday_cached = api.day_cache.get(('first_mile', today - timedelta(days=1))) is not None
+        assert yesterday_cached == api.is_closed_day(today - timedelta(days=1))
+
+        first = api.get_last_mile_truck_range('ICAD', week_ago, week_ago + timedelta(days=2))
+        calls.clear()
+        assert api.get_last_mile_truck_range('ICAD', week_ago, week_ago + timedelta(days=2)) == first
+        assert calls == []
+        assert first['days'][0] == {'date': week_ago.isoformat(), 'total_orders': 1,
+                                    'total_weight': 10, 'confirmed_orders': 1}
+    finally:
+        api.close()
@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_changes import ChangeProbe, ChangeWatch
+
+
+class FakeOdoo:
+    def __init__(self):
+        self.write_dates = {'x_container': '2025-01-01 08:00:00', 'x_scheduled_train': False}
+        self.calls = []
+
+    def latest_write_date(self, model):
+        self.calls.append(model)
+        return self.write_dates[model]
+
+
+def test_watch_reports_changes_by_newest_write_date():
+    odoo = FakeOdoo()
+    watch = ChangeWatch([ChangeProbe(odoo, 'x_container', max_age=0), ChangeProbe(odoo, 'x_scheduled_train', max_age=0)])
+
+    # Nothing seen yet
+    assert watch.changed()
+    assert not watch.changed()
+
+    odoo.write_dates['x_scheduled_train'] = '2025-01-01 08:05:00'
+    assert watch.changed()
+    assert not watch.changed()
+
+    # One cheap call per model and check
+    assert len(odoo.calls) == 8
+
+
+def test_sections_sharing_a_model_share_its_probe():
+    odoo = FakeOdoo()
+    probe = ChangeProbe(odoo, 'x_container', max_age=60)
+    ruw, all_locations = ChangeWatch([probe]), ChangeWatch([probe])
+
+    assert ruw.changed() and all_locations.changed()
+    assert odoo.calls == ['x_container']
+
+    # Each section sees a change once, from the same single probe
+    odoo.write_dates['x_container'] = '2025-01-01 08:05:00'
+    probe.max_age = 0
+    assert ruw.changed()
+    probe.max_age = 60
+    assert all_locations.changed()
+    assert not ruw.changed() and not all_locations.changed()
+    assert probe.stats() == {'queries': 2, 'reuses': 4, 'changes': 1}
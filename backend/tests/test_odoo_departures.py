@@ -0,0 +1,145 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_departures import DepartureWindow, ARRIVED, DEPARTED, STATUS_FIELD
+
+OPERATORS = {
+    '=': lambda a, b: a == b,
+    '>=': lambda a, b: a is not False and a >= b,
+    '<': lambda a, b: a is not False and a < b,
+    'not in': lambda a, b: a not in b,
+}
+
+
+def matches(record, domain):
+    """Evaluate a prefix-notation domain; leftover terms are AND-ed"""
+    def term(i):
+        item = domain[i]
+        if item in ('&', '|'):
+            left, i = term(i + 1)
+            right, i = term(i)
+            return (left and right) if item == '&' else (left or right), i
+        field, operator, value = item
+        return OPERATORS[operator](record.get(field, False), value), i + 1
+
+    i, result = 0, True
+    while i < len(domain):
+        value, i = term(i)
+        result = result and value
+    return result
+
+
+class FakeOdoo:
+    def __init__(self):
+        self.trains = {}
+        self.calls = []
+
+    def add(self, train_id, departure, status, write_date):
+        self.trains[train_id] = {'id': train_id, 'x_name': f'T{train_id}', 'x_studio_actual_departure': departure,
+                                 STATUS_FIELD: status, 'write_date': write_date}
+
+    def execute_kw(self, model, method, args=None, kwargs=None):
+        assert method == 'search_read'
+        records = [dict(r) for r in self.trains.values() if matches(r, args[0])]
+        self.calls.append((args[0], [r['id'] for r in records]))
+        return records
+
+
+def test_window_is_extended_and_refreshed_incrementally():
+    odoo = FakeOdoo()
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 09:00:00')
+    odoo.add(2, '2025-01-20 08:00:00', ARRIVED, '2025-01-21 09:00:00')
+    odoo.add(3, '2025-01-05 08:00:00', ARRIVED, '2025-01-06 09:00:00')
+    window = DepartureWindow(odoo)
+
+    trains = window.departures_since('2025-01-15')
+    assert [t['id'] for t in trains] == [1, 2]
+    assert len(odoo.calls) == 1
+
+    # A longer window reads only the older range, plus what changed since
+    odoo.add(4, '2025-01-26 08:00:00', DEPARTED, '2025-01-26 09:00:00')
+    odoo.calls.clear()
+    trains = window.departures_since('2025-01-01')
+    assert [t['id'] for t in trains] == [4, 1, 2, 3]
+    older, changed = odoo.calls
+    assert older[1] == [3]
+    # Arrived trains are never read again
+    assert ['id', 'not in', [2, 3]] in changed[0]
+    assert 2 not in changed[1] and 3 not in changed[1]
+
+    # Shorter windows are served from what is held, with one call for changes
+    odoo.add(1, '2025-01-25 08:00:00', ARRIVED, '2025-01-27 09:00:00')
+    odoo.calls.clear()
+    trains = window.departures_since('2025-01-15')
+    assert [(t['id'], t[STATUS_FIELD]) for t in trains] == [(4, DEPARTED), (1, ARRIVED), (2, ARRIVED)]
+    assert len(odoo.calls) == 1
+    assert window.stats()['covered_from'] == '2025-01-01'
+
+
+def test_trains_leaving_the_departed_states_are_dropped():
+    odoo = FakeOdoo()
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 09:00:00')
+    window = DepartureWindow(odoo)
+    assert len(window.departures_since('2025-01-15')) == 1
+
+    odoo.add(1, '2025-01-25 08:00:00', 'Cancelled', '2025-01-25 10:00:00')
+    assert window.departures_since('2025-01-15') == []
+
+
+def test_extending_the_window_does_not_skip_recent_changes():
+    odoo = FakeOdoo()
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 09:00:00')
+    # Departed before the first window but written after the train added below
+    odoo.add(2, '2025-01-05 08:00:00', ARRIVED, '2025-01-28 09:00:00')
+    window = DepartureWindow(odoo)
+    assert [t['id'] for t in window.departures_since('2025-01-15')] == [1]
+
+    odoo.add(3, '2025-01-26 08:00:00', DEPARTED, '2025-01-26 09:00:00')
+    trains = window.departures_since('2025-01-01')
+    assert [t['id'] for t in trains] == [3, 1, 2]
+
+
+def test_trains_that_lose_their_departure_are_dropped():
+    odoo = FakeOdoo()
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 09:00:00')
+    window = DepartureWindow(odoo)
+    assert len(window.departures_since('2025-01-15')) == 1
+
+    # Departure cleared, or corrected to before the window
+    odoo.add(1, False, DEPARTED, '2025-01-25 10:00:00')
+    assert window.departures_since('2025-01-15') == []
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 11:00:00')
+    assert len(window.departures_since('2025-01-15')) == 1
+    odoo.add(1, '2025-01-10 08:00:00', DEPARTED, '2025-01-25 12:00:00')
+    assert window.departures_since('2025-01-15') == []
+
+
+def test_odoo_is_not_called_under_the_lock():
+    import threading
+
+    odoo = FakeOdoo()
+    odoo.add(1, '2025-01-25 08:00:00', DEPARTED, '2025-01-25 09:00:00')
+    window = DepartureWindow(odoo)
+    fetching, release = threading.Event(), threading.Event()
+    execute_kw = odoo.execute_kw
+
+    def slow_execute_kw(*args, **kwargs):
+        fetching.set()
+        release.wait(5)
+        return execute_kw(*args, **kwargs)
+
+    odoo.execute_kw = slow_execute_kw
+    caller = threading.Thread(target=window.departures_since, args=('2025-01-15',))
+    caller.start()
+    assert fetching.wait(5)
+
+    # The window's state stays readable while the fetch is in flight
+    reader = threading.Thread(target=window.stats)
+    reader.start()
+    reader.join(1)
+    assert not reader.is_alive()
+
+    release.set()
+    caller.join(5)
+    assert window.stats()['trains'] == 1
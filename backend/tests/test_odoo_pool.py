@@ -0,0 +1,112 @@
+import threading
+import time
+import xmlrpc.client
+
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+        self.last_used = time.monotonic()
+
+    def check(self):
+        return self.healthy
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(factory, **kwargs), created
+
+
+def test_connection_is_reused():
+    pool, created = make_pool(max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats()['reused'] == 1
+
+
+def test_concurrent_callers_get_distinct_connections():
+    pool, created = make_pool(max_size=4)
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def worker():
+        with pool.connection() as conn:
+            seen.append(conn)
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(c) for c in seen}) == 4
+    assert pool.stats()['idle'] == 4
+
+
+def test_pool_is_bounded():
+    pool, _ = make_pool(max_size=1, acquire_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+
+
+def test_idle_connections_are_evicted():
+    pool, created = make_pool(max_size=2, idle_timeout=0.01)
+    with pool.connection():
+        pass
+    time.sleep(0.02)
+    with pool.connection() as conn:
+        pass
+    assert created[0].closed
+    assert conn is created[1]
+    assert pool.stats()['evicted'] == 1
+
+
+def test_unhealthy_connection_is_replaced():
+    pool, created = make_pool(max_size=2, health_check_interval=0)
+    with pool.connection() as conn:
+        conn.healthy = False
+    time.sleep(0.001)
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not conn
+    assert conn.closed
+    assert pool.stats()['failed_health_checks'] == 1
+
+
+def test_transport_error_discards_connection_but_fault_keeps_it():
+    pool, created = make_pool(max_size=2)
+    with pytest.raises(xmlrpc.client.Fault):
+        with pool.connection():
+            raise xmlrpc.client.Fault(1, 'server error')
+    assert pool.stats()['idle'] == 1
+
+    with pytest.raises(OSError):
+        with pool.connection():
+            raise OSError('connection reset')
+    assert pool.stats()['idle'] == 0
+    assert created[0].closed
@@ -0,0 +1,97 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_reference import ReferenceData
+
+
+class FakeOdoo:
+    """Answers search_read/read from in-memory tables and records every call"""
+    def __init__(self):
+        self.tables = {
+            'x_material': [{'id': 1, 'x_name': 'Aggregate 10mm', 'write_date': '2025-01-01 08:00:00'}],
+            'x_fwo': [{'id': 7, 'x_name': 'FWO/0007', 'write_date': '2025-01-01 09:00:00'}],
+        }
+        self.calls = []
+
+    def execute_kw(self, model, method, args=None, kwargs=None, cache=True):
+        self.calls.append((model, method, args))
+        records = self.tables[model]
+        if method == 'read':
+            return [r for r in records if r['id'] in args[0]]
+        domain = args[0]
+        for field, operator, value in domain:
+            if field == 'write_date':
+                records = [r for r in records if r['write_date'] >= value]
+            elif field == 'x_name':
+                names = value if operator == 'in' else [value]
+                records = [r for r in records if r['x_name'] in names]
+        return records[:kwargs.get('limit')] if kwargs.get('limit') else records
+
+
+def test_lookups_are_served_from_the_bulk_load():
+    odoo = FakeOdoo()
+    reference = ReferenceData(odoo)
+    reference.load()
+    assert len(odoo.calls) == 2
+
+    assert reference.material_name(1) == 'Aggregate 10mm'
+    assert reference.fwo_id_map(['FWO/0007']) == {'FWO/0007': 7}
+    assert len(odoo.calls) == 2
+
+
+def test_missing_names_are_negatively_cached():
+    odoo = FakeOdoo()
+    reference = ReferenceData(odoo, negative_ttl=60)
+    reference.load()
+
+    assert reference.fwo_id_map(['FWO/9999']) == {'FWO/9999': None}
+    assert reference.fwo_id_map(['FWO/9999']) == {'FWO/9999': None}
+    assert len(odoo.calls) == 3
+    assert reference.stats()['negative_hits'] == 1
+
+
+def test_refresh_only_fetches_changed_records():
+    odoo = FakeOdoo()
+    reference = ReferenceData(odoo, refresh_interval=0)
+    reference.load()
+    odoo.tables['x_fwo'].append({'id': 8, 'x_name': 'FWO/0008', 'write_date': '2025-01-02 10:00:00'})
+    odoo.calls.clear()
+
+    # The lookup triggers an incremental refresh, which picks up the new FWO
+    assert reference.fwo_id_map(['FWO/0008']) == {'FWO/0008': 8}
+    refresh_domains = {model: args[0] for model, method, args in odoo.calls}
+    assert refresh_domains['x_fwo'] == [['write_date', '>=', '2025-01-01 09:00:00']]
+    assert refresh_domains['x_material'] == [['write_date', '>=', '2025-01-01 08:00:00']]
+
+
+def test_refresh_bypasses_the_query_cache():
+    from odoo_api import OdooAPI
+
+    odoo = FakeOdoo()
+    api = OdooAPI()
+    api._execute_kw = odoo.execute_kw
+    try:
+        reference = ReferenceData(api)
+        reference.load()
+        reference.refresh()
+        # The material watermark hasn't moved, so this refresh repeats the previous query
+        odoo.tables['x_material'].append({'id': 2, 'x_name': 'Sand', 'write_date': '2025-01-03 08:00:00'})
+        reference.refresh()
+        assert reference.materials[2] == 'Sand'
+        assert len(odoo.calls) == 6
+    finally:
+        api.close()
+
+
+def test_several_names_are_resolved_with_one_query():
+    odoo = FakeOdoo()
+    reference = ReferenceData(odoo, negative_ttl=60)
+    reference.load()
+    # Older than the preload window
+    odoo.tables['x_fwo'].append({'id': 9, 'x_name': 'FWO/0009', 'write_date': '2024-06-01 10:00:00'})
+    odoo.calls.clear()
+
+    ids = reference.fwo_id_map(['FWO/0007', 'FWO/0009', 'FWO/9999', 'FWO/0007'])
+    assert ids == {'FWO/0007': 7, 'FWO/0009': 9, 'FWO/9999': None}
+    assert odoo.calls == [('x_fwo', 'search_read', [[['x_name', 'in', ['FWO/0009', 'FWO/9999']]]])]
@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from odoo_resilience import (
+    backoff_delay, call_key, Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, SingleFlight
+)
+from odoo_transport import OdooTransport
+from odoo_api import OdooAPI
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=0.5, cap=4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+    assert len({backoff_delay(3) for _ in range(20)}) > 1
+
+
+def test_circuit_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.before_call()  # still closed
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()['rejected_calls'] == 1
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_background_probe_closes_circuit():
+    probes = []
+
+    def probe():
+        probes.append(1)
+        if len(probes) < 2:
+            raise ConnectionError('still down')
+
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.01, probe=probe)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    deadline = time.monotonic() + 2
+    while breaker.state != CircuitBreaker.CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(probes) == 2
+    breaker.before_call()
+
+
+def test_singleflight_coalesces_concurrent_identical_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def slow_call():
+        executions.append(1)
+        release.wait(timeout=5)
+        return [{'id': 1}]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow_call))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while flight.stats()['coalesced'] < 4:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(executions) == 1
+    assert results == [[{'id': 1}]] * 5
+    # Waiters get their own copy so in-place enrichment can't leak between callers
+    assert len({id(r) for r in results}) == 5
+    assert flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0}
+
+
+def test_singleflight_propagates_errors_to_all_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing_call():
+        release.wait(timeout=5)
+        raise ConnectionError('odoo down')
+
+    def caller():
+        try:
+            flight.do('k', failing_call)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while flight.stats()['coalesced'] < 2:
+        time.sleep(0.005)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 3
+    # Once settled, the next call executes again
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_call_key_ignores_kwargs_order():
+    a = call_key('odoo', 'x_fwo', 'search_read', [[['x_name', '=', 'A']]], {'fields': ['id'], 'limit': 1})
+    b = call_key('odoo', 'x_fwo', 'search_read', [[['x_name', '=', 'A']]], {'limit': 1, 'fields': ['id']})
+    assert a == b
+    assert a != call_key('odoo2', 'x_fwo', 'search_read', [[['x_name', '=', 'A']]], {'fields': ['id'], 'limit': 1})
+
+
+def test_bulkhead_rejects_when_queue_is_full():
+    async def scenario():
+        bulkhead = Bulkhead('test', max_concurrent=1, max_queue=1)
+        release = threading.Event()
+
+        busy = asyncio.ensure_future(bulkhead.run(release.wait, 5))
+        while bulkhead.stats()['active'] < 1:
+            await asyncio.sleep(0.005)
+        queued = asyncio.ensure_future(bulkhead.run(lambda: 'queued'))
+        await asyncio.sleep(0)
+
+        with pytest.raises(BulkheadFullError):
+            await bulkhead.run(lambda: 'rejected')
+
+        release.set()
+        assert await queued == 'queued'
+        await busy
+        stats = bulkhead.stats()
+        bulkhead.shutdown()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats['rejected'] == 1
+    assert stats['completed'] == 2
+    assert stats['queue_depth'] == 0
+
+
+def test_bulkheads_are_isolated():
+    async def scenario():
+        slow = Bulkhead('slow', max_concurrent=1, max_queue=0)
+        fast = Bulkhead('fast', max_concurrent=1, max_queue=0)
+        release = threading.Event()
+        stuck = asyncio.ensure_future(slow.run(release.wait, 5))
+        while slow.stats()['active'] < 1:
+            await asyncio.sleep(0.005)
+
+        # The other backend keeps serving while this one is saturated
+        assert await fast.run(lambda: 'ok') == 'ok'
+        with pytest.raises(BulkheadFullError):
+            await slow.run(lambda: 'rejected')
+
+        release.set()
+        await stuck
+        slow.shutdown()
+        fast.shutdown()
+
+    asyncio.run(scenario())
+
+
+class ScriptedTransport(OdooTransport):
+    """Raises the scripted exceptions in turn, then answers every call with 'ok'"""
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        self.authentications = 0
+
+    def authenticate(self, db, username, api_key):
+        self.authentications += 1
+        return 2
+
+    def execute_kw(self, db, uid, api_key, model, method, args, kwargs):
+        self.calls.append((uid, method))
+        if self.outcomes:
+            raise self.outcomes.pop(0)
+        return 'ok'
+
+    def is_transient(self, exc):
+        return isinstance(exc, ConnectionResetError)
+
+    def is_access_denied(self, exc):
+        return isinstance(exc, PermissionError)
+
+
+@pytest.fixture
+def client():
+    api = OdooAPI()
+    api.retry_backoff = 0
+    api.max_retries = 2
+    api.uid = 1
+    yield api
+    api.close()
+
+
+def test_transient_read_failure_is_retried(client):
+    client.transport = ScriptedTransport(ConnectionResetError('reset'))
+    assert client._execute_kw('x_stockpile', 'search_read', [[]]) == 'ok'
+    assert len(client.transport.calls) == 2
+    assert client.get_stats()['retries'] == 1
+
+
+def test_access_denied_reauthenticates_once(client):
+    client.transport = ScriptedTransport(PermissionError('AccessDenied'))
+    assert client._execute_kw('x_stockpile', 'search_read', [[]]) == 'ok'
+    # Replayed with the new uid
+    assert client.transport.calls == [(1, 'search_read'), (2, 'search_read')]
+    assert client.transport.authentications == 1
+
+    client.transport = ScriptedTransport(PermissionError('AccessDenied'), PermissionError('AccessDenied'))
+    with pytest.raises(PermissionError):
+        client._execute_kw('x_stockpile', 'search_read', [[]])
+    assert client.transport.authentications == 1
+    assert client.get_stats()['reauthentications'] == 2
+
+
+def test_writes_are_not_retried(client):
+    client.transport = ScriptedTransport(ConnectionResetError('reset'))
+    with pytest.raises(ConnectionResetError):
+        client._execute_kw('x_stockpile', 'write', [[1], {'x_name': 'Silo 1'}])
+    assert len(client.transport.calls) == 1
+    assert client.get_stats()['retries'] == 0
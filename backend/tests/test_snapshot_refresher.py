@@ -0,0 +1,212 @@
+import asyncio
+import time
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot_refresher import SnapshotRefresher
+
+
+def test_publish_swaps_in_a_new_snapshot():
+    refresher = SnapshotRefresher()
+    refresher.add_section("stockpiles", None, interval=60)
+    before = refresher.snapshot
+
+    refresher.publish("stockpiles", {"NDP": []})
+
+    # Readers holding the old snapshot are unaffected by the swap
+    assert before.sections == {}
+    assert refresher.snapshot is not before
+    assert refresher.snapshot.version == before.version + 1
+    data, age = refresher.get("stockpiles")
+    assert data == {"NDP": []}
+    assert age < 1
+
+
+def test_sections_past_the_stale_factor_are_not_served():
+    refresher = SnapshotRefresher(stale_factor=2)
+    refresher.add_section("first_mile_truck", None, interval=0.05)
+    refresher.publish("first_mile_truck", {"total_orders": 1})
+    assert refresher.get("first_mile_truck") is not None
+
+    time.sleep(0.15)
+    assert refresher.get("first_mile_truck") is None
+    assert refresher.get("unregistered") is None
+
+
+def test_background_loops_refresh_and_keep_last_value_on_failure():
+    results = iter([{"total_orders": 1}, RuntimeError("Odoo down"), {"total_orders": 3}])
+
+    async def loader():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def scenario():
+        refresher = SnapshotRefresher()
+        refresher.add_section("first_mile_truck", loader, interval=0.2)
+        refresher.start()
+        await asyncio.sleep(0.05)
+        assert refresher.get("first_mile_truck")[0] == {"total_orders": 1}
+
+        await asyncio.sleep(0.2)
+        # The failed refresh left the previous value published
+        assert refresher.get("first_mile_truck")[0] == {"total_orders": 1}
+        assert refresher.stats()["sections"]["first_mile_truck"]["failures"] == 1
+
+        await asyncio.sleep(0.2)
+        assert refresher.get("first_mile_truck")[0] == {"total_orders": 3}
+        await refresher.stop()
+        assert not refresher.stats()["running"]
+
+    asyncio.run(scenario())
+
+
+def test_persisted_snapshot_is_restored_as_stale(tmp_path):
+    path = str(tmp_path / "snapshot.json.gz")
+
+    async def save():
+        refresher = SnapshotRefresher(persist_path=path)
+        refresher.add_section("stockpiles", None, interval=0.01)
+        refresher.publish("stockpiles", {"NDP": [{"name": "Silo 1"}]})
+        await refresher.persist()
+
+    asyncio.run(save())
+    time.sleep(0.05)
+
+    published = []
+    restarted = SnapshotRefresher(persist_path=path)
+    restarted.add_section("stockpiles", None, interval=0.01)
+    restarted.on_publish = lambda name, data, built_at: published.append(name)
+    assert restarted.restore() == 1
+
+    # Served despite being older than stale_factor intervals, until refreshed
+    data, age = restarted.get("stockpiles")
+    assert data == {"NDP": [{"name": "Silo 1"}]}
+    assert age >= 0.05
+    assert restarted.is_restored("stockpiles")
+    assert published == ["stockpiles"]
+
+    restarted.publish("stockpiles", {"NDP": []})
+    assert not restarted.is_restored("stockpiles")
+
+
+def test_unreadable_or_foreign_snapshot_files_are_ignored(tmp_path):
+    import gzip
+    import json
+
+    path = tmp_path / "snapshot.json.gz"
+    path.write_bytes(b"not gzip")
+    refresher = SnapshotRefresher(persist_path=str(path))
+    refresher.add_section("stockpiles", None, interval=60)
+    assert refresher.restore() == 0
+
+    path.write_bytes(gzip.compress(json.dumps({"file_version": 999, "sections": {}}).encode()))
+    assert refresher.restore() == 0
+
+
+def test_probed_sections_skip_refreshes_and_back_off_while_unchanged():
+    changes = iter([True, False, False, True])
+    loads = []
+
+    async def probe():
+        return next(changes)
+
+    async def loader():
+        loads.append(1)
+        return {"total": len(loads)}
+
+    async def scenario():
+        refresher = SnapshotRefresher()
+        refresher.add_section("ruw_containers", loader, interval=10, probe=probe, max_interval=40)
+        section = refresher._sections["ruw_containers"]
+
+        await refresher.refresh("ruw_containers")
+        assert len(loads) == 1
+
+        await refresher.refresh("ruw_containers")
+        await refresher.refresh("ruw_containers")
+        # Nothing changed: no reloads, polling slows down up to max_interval
+        assert len(loads) == 1
+        assert section.current_interval == 40
+        assert refresher.stats()["sections"]["ruw_containers"]["skips"] == 2
+
+        await refresher.refresh("ruw_containers")
+        assert len(loads) == 2
+        assert section.current_interval == 10
+        assert refresher.get("ruw_containers")[0] == {"total": 2}
+
+    asyncio.run(scenario())
+
+
+def test_requested_refresh_wakes_the_section_and_bypasses_the_probe():
+    loads = []
+
+    async def probe():
+        return False
+
+    async def loader():
+        loads.append(1)
+        return {"NDP": len(loads)}
+
+    async def scenario():
+        refresher = SnapshotRefresher()
+        refresher.add_section("stockpiles", loader, interval=60, probe=probe)
+        refresher.start()
+        await asyncio.sleep(0.05)
+        assert len(loads) == 1
+
+        # A change notification: rebuilt now, although write_date didn't move
+        assert refresher.request_refresh("stockpiles")
+        await asyncio.sleep(0.05)
+        assert len(loads) == 2
+        assert not refresher.request_refresh("unregistered")
+        await refresher.stop()
+
+    asyncio.run(scenario())
+
+
+def test_overdue_sections_are_stale():
+    refresher = SnapshotRefresher(stale_factor=10)
+    refresher.add_section("first_mile_truck", None, interval=0.05)
+    refresher.publish("first_mile_truck", {"total_orders": 1})
+    assert not refresher.is_stale("first_mile_truck")
+
+    # Still served, but no longer current
+    time.sleep(0.1)
+    assert refresher.get("first_mile_truck") is not None
+    assert refresher.is_stale("first_mile_truck")
+
+
+def test_sections_built_elsewhere_keep_their_build_time(tmp_path):
+    from snapshot_refresher import LoadedSection
+
+    path = str(tmp_path / "snapshot.json.gz")
+    built_at = time.time() - 30
+    shared = LoadedSection({"NDP": []}, built_at, verified_at=time.time())
+
+    async def loader():
+        return shared
+
+    async def scenario():
+        follower = SnapshotRefresher(persist_path=path)
+        follower.should_persist = lambda: False
+        follower.add_section("stockpiles", loader, interval=60)
+
+        await follower.refresh("stockpiles")
+        data, age = follower.get("stockpiles")
+        assert age >= 30
+        # Confirmed unchanged by its builder, so still current
+        assert not follower.is_stale("stockpiles")
+
+        # Reading the same build again publishes nothing new
+        version = follower.snapshot.version
+        await follower.refresh("stockpiles")
+        assert follower.snapshot.version == version
+
+        await follower.persist()
+        assert not os.path.exists(path)
+
+    asyncio.run(scenario())